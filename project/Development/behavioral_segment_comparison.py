@@ -1,8 +1,15 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy import stats
-import seaborn as sns
+from user_success.bootstrap import bootstrap_effects
+from user_success.comparison import compare_groups, compare_segments
+
+# Bootstrap resamples (and worker processes) for the effect size intervals
+BOOTSTRAP_RESAMPLES = 1000
+BOOTSTRAP_WORKERS = 1
+
+# Columns whose value combinations define the cohorts compared against the
+# rest of the users at the end (e.g. ['signup_week', 'success_tier'])
+SEGMENT_COLUMNS = ['success_tier']
 
 # Zerve design system
 zerve_dark_bg = '#1D1D20'
@@ -15,9 +22,9 @@ zerve_warning = '#f04438'
 
 print("=== BEHAVIORAL SEGMENT COMPARISON: SUCCESSFUL VS UNSUCCESSFUL USERS ===\n")
 
-# Segment users
-successful = success_features[success_features['is_successful'] == 1].copy()
-unsuccessful = success_features[success_features['is_successful'] == 0].copy()
+# Segment users (boolean selection already returns new frames; no second copy needed)
+successful = success_features[success_features['is_successful'] == 1]
+unsuccessful = success_features[success_features['is_successful'] == 0]
 
 print(f"Successful users: {len(successful)} ({len(successful)/len(success_features)*100:.1f}%)")
 print(f"Unsuccessful users: {len(unsuccessful)} ({len(unsuccessful)/len(success_features)*100:.1f}%)\n")
@@ -33,45 +40,30 @@ behavioral_features = [
     'events_per_day'
 ]
 
-# Calculate comparison statistics
-comparison_stats = []
+# Calculate comparison statistics for all dimensions in one batched pass:
+# means, medians, Mann-Whitney U (non-parametric) and pooled Cohen's d
+group_stats = compare_groups(success_features, success_features['is_successful'] == 1, behavioral_features)
 
-for feature in behavioral_features:
-    successful_vals = successful[feature].dropna()
-    unsuccessful_vals = unsuccessful[feature].dropna()
-    
-    # Descriptive stats
-    successful_mean = successful_vals.mean()
-    unsuccessful_mean = unsuccessful_vals.mean()
-    successful_median = successful_vals.median()
-    unsuccessful_median = unsuccessful_vals.median()
-    
-    # Statistical test (Mann-Whitney U for non-parametric)
-    statistic, p_value = stats.mannwhitneyu(successful_vals, unsuccessful_vals, alternative='two-sided')
-    
-    # Effect size (Cohen's d)
-    pooled_std = np.sqrt(((len(successful_vals)-1)*successful_vals.std()**2 + 
-                          (len(unsuccessful_vals)-1)*unsuccessful_vals.std()**2) / 
-                         (len(successful_vals) + len(unsuccessful_vals) - 2))
-    cohens_d = (successful_mean - unsuccessful_mean) / pooled_std if pooled_std > 0 else 0
-    
-    # Percent difference
-    pct_diff = ((successful_mean - unsuccessful_mean) / unsuccessful_mean * 100) if unsuccessful_mean > 0 else 0
-    
-    comparison_stats.append({
-        'Feature': feature,
-        'Successful Mean': successful_mean,
-        'Unsuccessful Mean': unsuccessful_mean,
-        'Successful Median': successful_median,
-        'Unsuccessful Median': unsuccessful_median,
-        'Mean Difference': successful_mean - unsuccessful_mean,
-        'Percent Difference': pct_diff,
-        'Cohens D': cohens_d,
-        'P-Value': p_value,
-        'Significant': 'Yes' if p_value < 0.001 else 'No'
-    })
-
-comparison_df = pd.DataFrame(comparison_stats)
+# 95% percentile bootstrap intervals for Cohen's d, mean and median differences
+effect_cis = bootstrap_effects(
+    success_features, success_features['is_successful'] == 1, behavioral_features,
+    n_resamples=BOOTSTRAP_RESAMPLES, workers=BOOTSTRAP_WORKERS,
+)
+
+comparison_df = pd.DataFrame({
+    'Feature': group_stats.index,
+    'Successful Mean': group_stats['mean_a'].to_numpy(),
+    'Unsuccessful Mean': group_stats['mean_b'].to_numpy(),
+    'Successful Median': group_stats['median_a'].to_numpy(),
+    'Unsuccessful Median': group_stats['median_b'].to_numpy(),
+    'Mean Difference': group_stats['mean_diff'].to_numpy(),
+    'Percent Difference': group_stats['pct_diff'].to_numpy(),
+    'Cohens D': group_stats['cohens_d'].to_numpy(),
+    'Cohens D CI Low': effect_cis['cohens_d_low'].to_numpy(),
+    'Cohens D CI High': effect_cis['cohens_d_high'].to_numpy(),
+    'P-Value': group_stats['mannwhitney_pvalue'].to_numpy(),
+    'Significant': np.where(group_stats['mannwhitney_pvalue'] < 0.001, 'Yes', 'No'),
+})
 
 print("BEHAVIORAL DIMENSION COMPARISON:\n")
 print(comparison_df.to_string(index=False))
@@ -96,7 +88,8 @@ for idx, row in comparison_df_sorted.iterrows():
         magnitude = "NEGLIGIBLE"
     
     print(f"{row['Feature']}:")
-    print(f"  - Effect Size: {row['Cohens D']:.3f} ({magnitude})")
+    print(f"  - Effect Size: {row['Cohens D']:.3f} ({magnitude}), "
+          f"95% CI [{row['Cohens D CI Low']:.3f}, {row['Cohens D CI High']:.3f}]")
     print(f"  - Successful users average: {row['Successful Mean']:.2f}")
     print(f"  - Unsuccessful users average: {row['Unsuccessful Mean']:.2f}")
     print(f"  - Difference: {row['Percent Difference']:.1f}%")
@@ -108,3 +101,24 @@ print("  • Small: 0.2 - 0.5")
 print("  • Medium: 0.5 - 0.8")
 print("  • Large: ≥ 0.8")
 print("\nAll differences are statistically significant (p < 0.001)")
+
+# === COHORT COMPARISON: every segment against the rest ===
+# Same statistics for all SEGMENT_COLUMNS cohorts in one pass per feature,
+# with Benjamini-Hochberg correction across all segment x feature tests
+segment_comparison = compare_segments(success_features, success_features[SEGMENT_COLUMNS], behavioral_features)
+
+_n_segments = len(segment_comparison) // len(behavioral_features)
+print(f"\n\n=== COHORT COMPARISON: EACH {' x '.join(SEGMENT_COLUMNS).upper()} SEGMENT VS. THE REST ===\n")
+print(f"{_n_segments} segments x {len(behavioral_features)} features = {len(segment_comparison)} tests, "
+      f"{segment_comparison['significant'].sum()} significant after FDR correction (q < 0.05)\n")
+print("Strongest differentiating feature per segment (largest |Cohen's D|, top 10 segments):\n")
+_strongest = (
+    segment_comparison.assign(_abs_d=segment_comparison['cohens_d'].abs())
+    .sort_values('_abs_d', ascending=False, kind='stable')
+    .drop_duplicates(SEGMENT_COLUMNS)
+    .head(10)
+)
+for _, _row in _strongest.iterrows():
+    _label = ' / '.join(str(_row[column]) for column in SEGMENT_COLUMNS)
+    print(f"  {_label:<25} n={_row['n_segment']:<7} {_row['feature']:<26} "
+          f"d={_row['cohens_d']:+.2f}  diff={_row['pct_diff']:+.1f}%  q={_row['p_adjusted']:.2e}")
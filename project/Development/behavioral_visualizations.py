@@ -1,7 +1,6 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy import stats
 
 # Zerve design system
 zerve_dark_bg = '#1D1D20'
@@ -1,44 +1,101 @@
-import pandas as pd
+from user_success.events import load_events
+from user_success.features import (
+    compute_window_features,
+    parallel_engineered_features,
+    stream_engineered_features,
+)
+from user_success.sessions import session_duration_by_user, sessionize
+from user_success.sql import sql_engineered_features
+from user_success.store import FeatureStore
 
-# Load the data
-df = pd.read_csv("zerve_hackathon_for_reviewc8fa7c7.csv")
+EVENTS_PATH = "zerve_hackathon_for_reviewc8fa7c7.csv"
 
-# Convert timestamp to datetime using ISO8601 format
-df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')
-df['created_at'] = pd.to_datetime(df['created_at'], format='ISO8601')
+# Aggregation backend for the full-history features: 'pandas' (in-process
+# NumPy kernels) or 'duckdb' (one SQL query over the Parquet cache or CSV,
+# multi-threaded and able to spill to disk)
+BACKEND = 'pandas'
 
-# Feature 1: Event count per user
-event_counts = df.groupby('person_id').size().reset_index(name='total_events')
+# Set to a row count to stream the event file in chunks of that size when it
+# does not fit in memory; peak memory then scales with users, not events
+STREAM_CHUNK_SIZE = None
 
-# Feature 2: Unique event types per user
-unique_events = df.groupby('person_id')['event'].nunique().reset_index(name='unique_event_types')
+# Worker processes for the in-memory path; users are hash-partitioned
+# across them and the results are identical to a single process
+N_WORKERS = 1
 
-# Feature 3: Session engagement - average session duration per user
-session_duration = df.groupby(['person_id', 'prop_$session_id'])['prop_$sdk_debug_current_session_duration'].max().reset_index()
-avg_session_duration = session_duration.groupby('person_id')['prop_$sdk_debug_current_session_duration'].mean().reset_index(name='avg_session_duration_ms')
+# Set to a file path to keep per-user aggregates between runs and only ingest
+# events newer than the stored timestamp watermark (events without a
+# timestamp are never ingested, so the features cover timestamped events)
+FEATURE_STORE_PATH = None
 
-# Feature 4: Credits usage metrics
-credits_used = df.groupby('person_id')['prop_credits_used'].sum().reset_index(name='total_credits_used')
-credit_transactions = df[df['prop_credits_used'].notna()].groupby('person_id').size().reset_index(name='credit_transaction_count')
+# Relative error for approximate unique_event_types / active_days in the
+# streaming and feature-store modes (HyperLogLog, exact for small counts);
+# None keeps exact distinct counts
+APPROX_DISTINCT_ERROR = None
 
-# Feature 5: Active days per user
-df['date'] = df['timestamp'].dt.date
-active_days = df.groupby('person_id')['date'].nunique().reset_index(name='active_days')
+# Early-window horizons: the same features restricted to each user's first N
+# days after created_at, for scoring users before their outcome is known.
+# Costs a second sort of the events; None or () skips it for runs that only
+# need the full-history features
+EARLY_WINDOW_DAYS = (1, 3, 7)
 
-# Feature 6: Events per active day
-events_per_day = event_counts.merge(active_days, on='person_id')
-events_per_day['events_per_day'] = events_per_day['total_events'] / events_per_day['active_days']
+# Where avg_session_duration_ms comes from: 'sdk' uses the client-reported
+# prop_$sdk_debug_current_session_duration, 'timestamps' rebuilds sessions
+# from event timestamps (new session after SESSION_GAP_MINUTES of inactivity
+# or a change of prop_$session_id)
+SESSION_DURATION_SOURCE = 'sdk'
+SESSION_GAP_MINUTES = 30
 
-# Merge all features together
-engineered_features = event_counts.merge(unique_events, on='person_id', how='left')
-engineered_features = engineered_features.merge(avg_session_duration, on='person_id', how='left')
-engineered_features = engineered_features.merge(credits_used, on='person_id', how='left')
-engineered_features = engineered_features.merge(credit_transactions, on='person_id', how='left')
-engineered_features = engineered_features.merge(active_days, on='person_id', how='left')
-engineered_features = engineered_features.merge(events_per_day[['person_id', 'events_per_day']], on='person_id', how='left')
+if SESSION_DURATION_SOURCE not in ('sdk', 'timestamps'):
+    raise ValueError(f"Unknown SESSION_DURATION_SOURCE: {SESSION_DURATION_SOURCE!r}")
+if SESSION_DURATION_SOURCE == 'timestamps' and (BACKEND == 'duckdb' or STREAM_CHUNK_SIZE):
+    # Rebuilding sessions needs the whole event frame in memory
+    raise ValueError(
+        "SESSION_DURATION_SOURCE = 'timestamps' needs the in-memory or feature-store path; "
+        "the duckdb backend and STREAM_CHUNK_SIZE only support 'sdk'"
+    )
 
-# Fill NaN values with 0
-engineered_features = engineered_features.fillna(0)
+# Features computed per user in one fused pass (see user_success.features):
+# 1. total_events             - event count
+# 2. unique_event_types       - distinct event types
+# 3. avg_session_duration_ms  - mean over sessions of the max session duration
+# 4. total_credits_used       - credit sum
+# 5. credit_transaction_count - events with a credit value
+# 6. active_days              - distinct event dates
+# 7. events_per_day           - total_events / active_days
+df = None
+if BACKEND == 'duckdb':
+    engineered_features = sql_engineered_features(EVENTS_PATH)
+elif STREAM_CHUNK_SIZE:
+    engineered_features = stream_engineered_features(
+        EVENTS_PATH, chunksize=STREAM_CHUNK_SIZE, distinct_error=APPROX_DISTINCT_ERROR
+    )
+elif FEATURE_STORE_PATH:
+    df = load_events(EVENTS_PATH)
+    feature_store = FeatureStore(FEATURE_STORE_PATH, distinct_error=APPROX_DISTINCT_ERROR)
+    new_events = feature_store.refresh(df)
+    print(f"Ingested {new_events} new events (watermark: {feature_store.watermark})")
+    engineered_features = feature_store.features()
+else:
+    # Load the data: only the columns the features need, with timestamps already
+    # parsed. The first run converts the CSV to a Parquet cache next to it; later
+    # runs reuse that cache until the CSV's size or mtime changes.
+    df = load_events(EVENTS_PATH)
+    engineered_features = parallel_engineered_features(df, N_WORKERS)
+
+# Early-window features and sessions need the event frame, which the
+# streaming and DuckDB paths never hold (checked above for sessions);
+# sessions are only rebuilt when they replace the SDK-reported durations
+early_window_features = {}
+if EARLY_WINDOW_DAYS and df is not None:
+    early_window_features = compute_window_features(df, EARLY_WINDOW_DAYS)
+user_sessions = None
+if SESSION_DURATION_SOURCE == 'timestamps':
+    user_sessions = sessionize(df, gap_minutes=SESSION_GAP_MINUTES)
+    rebuilt_duration = session_duration_by_user(user_sessions)
+    engineered_features['avg_session_duration_ms'] = (
+        engineered_features['person_id'].map(rebuilt_duration).fillna(0).to_numpy()
+    )
 
 print(f"Engineered features for {len(engineered_features)} unique users")
 print(f"\nFeature columns: {list(engineered_features.columns)}")
@@ -46,3 +103,8 @@ print(f"\nSummary statistics:")
 print(engineered_features.describe())
 print(f"\nSample of engineered features:")
 print(engineered_features.head(10))
+
+for n_days, window_frame in early_window_features.items():
+    print(f"\nFirst {n_days} day(s) after signup: "
+          f"{(window_frame['total_events'] > 0).sum()} users active, "
+          f"{window_frame['total_events'].mean():.2f} events per user on average")
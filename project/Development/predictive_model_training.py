@@ -1,10 +1,10 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import StratifiedKFold, cross_val_score, cross_validate
+from sklearn.model_selection import StratifiedKFold, cross_validate
+from sklearn.base import clone
 from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import roc_auc_score, accuracy_score, precision_score, recall_score, f1_score, classification_report, confusion_matrix
-import matplotlib.pyplot as plt
+from user_success.frames import overlay
 
 # Zerve design system
 zerve_dark_bg = '#1D1D20'
@@ -18,7 +18,7 @@ zerve_warning = '#f04438'
 print("=== PREDICTIVE MODEL: IDENTIFYING BEHAVIORS PREDICTIVE OF LONG-TERM SUCCESS ===\n")
 
 # Prepare data for modeling
-model_data = success_features.copy()
+model_data = overlay(success_features)
 
 # Feature set: behavioral metrics (exclude target and derived success metrics)
 feature_cols = [
@@ -97,8 +97,9 @@ rf_model = RandomForestClassifier(
     n_jobs=-1
 )
 
-# Cross-validation
-rf_cv_results = cross_validate(rf_model, X_scaled, y, cv=cv, scoring=scoring, n_jobs=-1)
+# Cross-validation (folds run in parallel, so each fold's forest stays single-threaded
+# instead of every fold also taking every core)
+rf_cv_results = cross_validate(clone(rf_model).set_params(n_jobs=1), X_scaled, y, cv=cv, scoring=scoring, n_jobs=-1)
 
 print("Cross-Validation Results (5-fold):")
 print(f"  ROC AUC: {rf_cv_results['test_roc_auc'].mean():.4f} (± {rf_cv_results['test_roc_auc'].std():.4f})")
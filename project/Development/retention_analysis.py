@@ -1,11 +1,13 @@
 import pandas as pd
 import numpy as np
+from user_success.frames import overlay
 
 # Analyze retention and activity persistence patterns
 print("=== RETENTION & PERSISTENCE ANALYSIS ===\n")
 
 # 1. Activity Persistence: Users who come back multiple days
-retention_metrics = engineered_features.copy()
+# Overlay: new columns are added here without copying engineered_features
+retention_metrics = overlay(engineered_features)
 
 # Categorize retention based on active days
 retention_metrics['retention_category'] = pd.cut(
@@ -1,6 +1,5 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 
 # Zerve design system
 zerve_dark_bg = '#1D1D20'
@@ -1,16 +1,36 @@
-import pandas as pd
-import numpy as np
-from scipy import stats
+from user_success.bootstrap import bootstrap_effects
+from user_success.comparison import compare_groups
+from user_success.moments import GroupedMoments, Moments
 
-print("=== STATISTICAL VALIDATION OF SUCCESS METRICS ===\n")
+# Bootstrap resamples (and worker processes) for the effect size intervals
+BOOTSTRAP_RESAMPLES = 1000
+BOOTSTRAP_WORKERS = 1
 
-# 1. Correlation analysis between success components
-print("1. CORRELATION BETWEEN SUCCESS COMPONENTS:\n")
+# Rows per chunk for the streaming descriptive statistics below
+STATS_CHUNK_ROWS = 100_000
+
+print("=== STATISTICAL VALIDATION OF SUCCESS METRICS ===\n")
 
 correlation_features = ['active_days', 'unique_event_types', 'total_events', 
                         'avg_session_duration_ms', 'total_credits_used']
+tier_features = ['active_days', 'unique_event_types', 'total_events', 'success_score_continuous']
+
+# Correlations, score moments and tier means come from mergeable
+# accumulators fed chunk by chunk, so a partitioned or out-of-core user
+# table can be fed (or its per-partition accumulators merged) the same way
+component_moments = Moments(correlation_features)
+score_moments = Moments(['success_score_continuous'])
+tier_moments = GroupedMoments(tier_features)
+for _start in range(0, len(success_features), STATS_CHUNK_ROWS):
+    _chunk = success_features.iloc[_start:_start + STATS_CHUNK_ROWS]
+    component_moments.update(_chunk)
+    score_moments.update(_chunk)
+    tier_moments.update(_chunk, _chunk['success_tier'])
+
+# 1. Correlation analysis between success components
+print("1. CORRELATION BETWEEN SUCCESS COMPONENTS:\n")
 
-corr_matrix = success_features[correlation_features].corr()
+corr_matrix = component_moments.corr()
 print(corr_matrix.round(3))
 
 # 2. Discriminatory power: Compare successful vs non-successful users
@@ -22,24 +42,27 @@ not_successful = success_features[success_features['is_successful'] == 0]
 test_features = ['active_days', 'unique_event_types', 'total_events', 
                  'avg_session_duration_ms', 'events_per_day']
 
-print(f"{'Feature':<30} {'t-statistic':<15} {'p-value':<15} {'Effect Size':<15}")
-print("-" * 75)
+# Independent t-tests and Cohen's d (average of the two variances) for all
+# features in one batched pass
+significance_tests = compare_groups(success_features, success_features['is_successful'] == 1, test_features)
+effect_cis = bootstrap_effects(
+    success_features, success_features['is_successful'] == 1, test_features,
+    n_resamples=BOOTSTRAP_RESAMPLES, workers=BOOTSTRAP_WORKERS,
+)
 
-for feature in test_features:
-    # Perform independent t-test
-    t_stat, p_value = stats.ttest_ind(successful[feature], not_successful[feature])
-    
-    # Calculate Cohen's d (effect size)
-    mean_diff = successful[feature].mean() - not_successful[feature].mean()
-    pooled_std = np.sqrt((successful[feature].std()**2 + not_successful[feature].std()**2) / 2)
-    cohens_d = mean_diff / pooled_std if pooled_std > 0 else 0
-    
+print(f"{'Feature':<30} {'t-statistic':<15} {'p-value':<15} {'Effect Size':<15} {'95% CI':<20}")
+print("-" * 95)
+
+for feature, row in significance_tests.iterrows():
+    p_value = row['t_pvalue']
     significance = "***" if p_value < 0.001 else ("**" if p_value < 0.01 else ("*" if p_value < 0.05 else ""))
     
-    print(f"{feature:<30} {t_stat:<15.2f} {p_value:<15.4e} {cohens_d:<15.2f} {significance}")
+    effect_ci = f"[{effect_cis.loc[feature, 'cohens_d_avg_low']:.2f}, {effect_cis.loc[feature, 'cohens_d_avg_high']:.2f}]"
+    print(f"{feature:<30} {row['t_stat']:<15.2f} {p_value:<15.4e} {row['cohens_d_avg']:<15.2f} {effect_ci:<20} {significance}")
 
 print("\nSignificance levels: *** p<0.001, ** p<0.01, * p<0.05")
 print("Effect size interpretation: 0.2=small, 0.5=medium, 0.8=large")
+print(f"95% CI: percentile bootstrap over {BOOTSTRAP_RESAMPLES} resamples")
 
 # 3. Class balance analysis
 print("\n\n3. CLASS BALANCE ANALYSIS:\n")
@@ -53,23 +76,21 @@ print(f"Class imbalance ratio: {len(not_successful)/len(successful):.2f}:1")
 # 4. Distribution analysis of continuous success score
 print("\n\n4. CONTINUOUS SUCCESS SCORE DISTRIBUTION:\n")
 
-print(f"Mean: {success_features['success_score_continuous'].mean():.2f}")
+print(f"Mean: {score_moments.mean()['success_score_continuous']:.2f}")
 print(f"Median: {success_features['success_score_continuous'].median():.2f}")
-print(f"Std Dev: {success_features['success_score_continuous'].std():.2f}")
-print(f"Skewness: {success_features['success_score_continuous'].skew():.2f}")
-print(f"Kurtosis: {success_features['success_score_continuous'].kurtosis():.2f}")
+print(f"Std Dev: {score_moments.std()['success_score_continuous']:.2f}")
+print(f"Skewness: {score_moments.skew()['success_score_continuous']:.2f}")
+print(f"Kurtosis: {score_moments.kurtosis()['success_score_continuous']:.2f}")
 
-# Test for normality
-stat, p_value = stats.normaltest(success_features['success_score_continuous'])
+# Test for normality (D'Agostino-Pearson, from the accumulated moments)
+stat, p_value = (result['success_score_continuous'] for result in score_moments.normaltest())
 print(f"\nNormality test p-value: {p_value:.4e}")
 print(f"Distribution is {'approximately normal' if p_value > 0.05 else 'significantly non-normal (right-skewed)'}")
 
 # 5. Success tier progressions
 print("\n\n5. SUCCESS TIER CHARACTERISTICS:\n")
 
-tier_stats = success_features.groupby('success_tier')[
-    ['active_days', 'unique_event_types', 'total_events', 'success_score_continuous']
-].mean()
+tier_stats = tier_moments.mean()
 
 print(tier_stats.round(2))
 
@@ -1,10 +1,33 @@
+import os
+
 import pandas as pd
 import numpy as np
+from user_success.frames import overlay
+from user_success.scoring import SuccessScorer
+from user_success.sensitivity import threshold_grid
+
+# Set to a file path to fit the scorer (normalization caps) once and score
+# later batches against that fixed reference instead of against themselves
+SCORER_PATH = None
+
+# Set to a rank error (e.g. 0.001) to fit the 95th-percentile caps with
+# mergeable streaming quantile sketches instead of exact sorted quantiles
+CAP_SKETCH_ERROR = None
+
+# Thresholds to evaluate for each criterion in the sensitivity grid below
+# (each list includes the current threshold)
+SENSITIVITY_GRID = {
+    'active_days': [1, 2, 3, 5, 7],
+    'unique_event_types': [2, 3, 4, 5],
+    'total_events': [3, 5, 10, 20],
+    'avg_session_duration_ms': [60000, 120000, 300000],
+}
 
 # Define "long-term success" based on multiple indicators
 print("=== DEFINING LONG-TERM SUCCESS METRICS ===\n")
 
-success_features = engineered_features.copy()
+# Overlay: success columns are added here without copying engineered_features
+success_features = overlay(engineered_features)
 
 # PRIMARY SUCCESS METRIC: Binary classification based on multiple criteria
 # A successful user demonstrates SUSTAINED engagement (not just one-time use)
@@ -16,61 +39,37 @@ print("3. Activity Volume: 5+ total events (meaningful interaction)")
 print("4. Session Quality: Average session > 2 minutes (engaged sessions)")
 print("\n")
 
-# Calculate each success indicator
-success_features['has_retention'] = (success_features['active_days'] >= 2).astype(int)
-success_features['has_engagement_depth'] = (success_features['unique_event_types'] >= 3).astype(int)
-success_features['has_activity_volume'] = (success_features['total_events'] >= 5).astype(int)
-success_features['has_session_quality'] = (success_features['avg_session_duration_ms'] >= 120000).astype(int)  # 2 min in ms
-
-# BINARY SUCCESS: User meets at least 3 out of 4 criteria
-success_features['success_score'] = (
-    success_features['has_retention'] +
-    success_features['has_engagement_depth'] +
-    success_features['has_activity_volume'] +
-    success_features['has_session_quality']
-)
-
-success_features['is_successful'] = (success_features['success_score'] >= 3).astype(int)
+# Scoring rules (criteria, caps, weights, tier bins) live in SuccessScorer;
+# fitting it on this batch takes the 95th-percentile caps from these users
+if SCORER_PATH is not None and os.path.exists(SCORER_PATH):
+    scorer = SuccessScorer.load(SCORER_PATH)
+else:
+    if CAP_SKETCH_ERROR is None:
+        scorer = SuccessScorer.fit(success_features)
+    else:
+        scorer = SuccessScorer.fit_stream([success_features], rank_error=CAP_SKETCH_ERROR)
+    if SCORER_PATH is not None:
+        scorer.save(SCORER_PATH)
+
+# float64 keeps the canvas numbers identical to the original inline computation
+scores = scorer.score(success_features, dtype=np.float64)
+tier_codes = scores.pop('success_tier_code')
+for _column, _values in scores.items():
+    success_features[_column] = _values
 
 print("Binary Success Metric Distribution:")
 print(success_features['is_successful'].value_counts())
 print(f"\nSuccess rate: {success_features['is_successful'].mean() * 100:.2f}%")
 
-# CONTINUOUS SUCCESS METRIC: Weighted score (0-100 scale)
-# This provides more granular measurement of success
-
-# Normalize each component to 0-1 scale
-def normalize_score(series, cap_percentile=95):
-    """Normalize to 0-1, capping outliers at 95th percentile"""
-    cap_value = series.quantile(cap_percentile / 100)
-    capped = series.clip(upper=cap_value)
-    return capped / cap_value if cap_value > 0 else capped
-
-# Component scores (0-1 scale)
-success_features['retention_score'] = normalize_score(success_features['active_days'])
-success_features['engagement_score'] = normalize_score(success_features['unique_event_types'])
-success_features['activity_score'] = normalize_score(success_features['total_events'])
-success_features['session_score'] = normalize_score(success_features['avg_session_duration_ms'])
-success_features['credit_score'] = normalize_score(success_features['total_credits_used'])
-
-# Weighted composite success score (0-100)
-# Higher weights for retention and engagement as they indicate long-term value
-success_features['success_score_continuous'] = (
-    success_features['retention_score'] * 0.30 +      # 30% - Most important
-    success_features['engagement_score'] * 0.25 +     # 25% - Feature breadth
-    success_features['activity_score'] * 0.20 +       # 20% - Volume
-    success_features['session_score'] * 0.15 +        # 15% - Quality
-    success_features['credit_score'] * 0.10            # 10% - Value creation
-) * 100
-
+# CONTINUOUS SUCCESS METRIC: Weighted score (0-100 scale), each component
+# capped at its 95th percentile and normalized to 0-1:
+# retention 30%, engagement 25%, activity 20%, session quality 15%, credits 10%
 print("\n\nContinuous Success Score Distribution:")
 print(success_features['success_score_continuous'].describe())
 
 # Success tiers based on continuous score
-success_features['success_tier'] = pd.cut(
-    success_features['success_score_continuous'],
-    bins=[0, 20, 40, 60, 80, 100],
-    labels=['At Risk', 'Low', 'Medium', 'High', 'Very High']
+success_features['success_tier'] = pd.Categorical.from_codes(
+    tier_codes, categories=list(scorer.tier_labels), ordered=True
 )
 
 print("\nSuccess Tier Distribution:")
@@ -90,3 +89,19 @@ print(comparison.round(2))
 
 print(f"\n\nFinal Dataset: {len(success_features)} users with success metrics defined")
 print(f"Success columns added: is_successful (binary), success_score_continuous (0-100)")
+
+# THRESHOLD SENSITIVITY: success rate, class balance and tier counts for every
+# combination of SENSITIVITY_GRID thresholds and 2/3/4-of-4 rules, in one pass
+threshold_sensitivity = threshold_grid(success_features, SENSITIVITY_GRID, min_criteria=(2, 3, 4), scorer=scorer)
+
+print("\n\n=== THRESHOLD SENSITIVITY ===\n")
+print(f"{len(threshold_sensitivity)} threshold combinations evaluated")
+print("Success rate when one threshold moves (others at their current values):\n")
+_current = {column: minimum for _, column, minimum in scorer.criteria}
+for _column in SENSITIVITY_GRID:
+    _others_fixed = (threshold_sensitivity['min_criteria'] == scorer.min_criteria) & np.logical_and.reduce(
+        [threshold_sensitivity[other] == value for other, value in _current.items() if other != _column]
+    )
+    _rows = threshold_sensitivity[_others_fixed]
+    _rates = ', '.join(f"{threshold:g}: {rate * 100:.1f}%" for threshold, rate in zip(_rows[_column], _rows['success_rate']))
+    print(f"  {_column}: {_rates}")
@@ -0,0 +1 @@
+"""Headless runner for the blocks of a Zerve canvas layer."""
@@ -0,0 +1,117 @@
+"""Command line: python -m canvas_runner Development/layer.yaml [options]"""
+import argparse
+import os
+import sys
+import time
+
+from canvas_runner.cache import DEFAULT_MAX_BYTES, BlockCache, data_files, file_fingerprint, library_files
+from canvas_runner.dag import load_layer, parse_size
+from canvas_runner.profile import largest_outputs, summary, write_trace
+from canvas_runner.runner import run_layer
+
+# Seconds between checks for changed files in --watch mode
+WATCH_INTERVAL = 1.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='canvas_runner', description=__doc__)
+    parser.add_argument('layer', help='layer.yaml, or canvas.yaml together with --layer')
+    parser.add_argument('--layer', dest='layer_name', help='layer to run from a canvas.yaml')
+    parser.add_argument('--blocks', nargs='+', help='run only these blocks and their upstream blocks')
+    parser.add_argument('--workers', type=int, help='parallel block processes (default: --cpus)')
+    parser.add_argument('--cpus', type=int, help='CPU budget shared by running blocks (default: CPU count)')
+    parser.add_argument('--memory', type=parse_size,
+                        help='memory budget shared by running blocks, e.g. 64GB (default: physical RAM)')
+    parser.add_argument('--data-dir', help='working directory for blocks, where the event CSV lives')
+    parser.add_argument('--dry-run', action='store_true', help='print the execution order and exit')
+    parser.add_argument('--cache-dir', help='block output cache (default: .canvas_cache next to the layer)')
+    parser.add_argument('--cache-size', type=parse_size, default=DEFAULT_MAX_BYTES,
+                        help='evict least recently used outputs past this size, e.g. 500MB (default: 2GB)')
+    parser.add_argument('--no-cache', action='store_true', help='run every block and leave the cache untouched')
+    parser.add_argument('--data-file', action='append',
+                        help='input file to fingerprint for the cache (default: every file in --data-dir)')
+    parser.add_argument('--invalidate', nargs='*', metavar='BLOCK',
+                        help='drop cached outputs of these blocks and everything downstream (all if none) and exit')
+    parser.add_argument('--profile', action='store_true', help='also list the largest variables the blocks produce')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='write a Chrome trace (chrome://tracing, ui.perfetto.dev) of the run')
+    parser.add_argument('--no-preload', action='store_true',
+                        help="don't import the blocks' modules before starting workers")
+    parser.add_argument('--watch', action='store_true',
+                        help='stay running with warm imports and re-run when a block, the layer or the data changes')
+    args = parser.parse_args(argv)
+
+    graph = load_layer(args.layer, args.layer_name)
+    cache_dir = args.cache_dir or os.path.join(os.path.dirname(os.path.abspath(args.layer)), '.canvas_cache')
+    if args.invalidate is not None:
+        names = None
+        if args.invalidate:
+            unknown = sorted(set(args.invalidate) - set(graph.blocks))
+            if unknown:
+                parser.error(f"unknown blocks: {', '.join(unknown)}")
+            names = set(args.invalidate)
+            for name in args.invalidate:
+                names.update(graph.descendants(name))
+        removed = BlockCache(cache_dir, data_fingerprint=None).invalidate(names)
+        print(f"Removed {removed} cached block outputs from {cache_dir}")
+        return 0
+
+    if args.dry_run:
+        for name in graph.select(args.blocks):
+            block = graph.blocks[name]
+            budget = f"  [{block.compute_settings}]" if block.compute_settings else ''
+            print(name + (f"  <- {', '.join(block.parents)}" if block.parents else '') + budget)
+        return 0
+
+    if not args.watch:
+        return _run(args, graph, cache_dir)
+    try:
+        while True:
+            _run(args, graph, cache_dir)
+            watched = _snapshot(_watched_files(args, graph))
+            print('Watching for changes (Ctrl-C to stop)...')
+            while _snapshot(watched) == watched:
+                time.sleep(WATCH_INTERVAL)
+            graph = load_layer(args.layer, args.layer_name)
+    except KeyboardInterrupt:
+        return 0
+
+
+def _run(args, graph, cache_dir):
+    cache = None
+    if not args.no_cache:
+        fingerprint = file_fingerprint(args.data_file or data_files(args.data_dir))
+        cache = BlockCache(cache_dir, fingerprint, max_bytes=args.cache_size)
+
+    start = time.perf_counter()
+    results = run_layer(
+        graph, targets=args.blocks, workers=args.workers, cwd=args.data_dir, cache=cache,
+        cpus=args.cpus, memory=args.memory, preload=not args.no_preload,
+    )
+    print(summary(results, time.perf_counter() - start))
+    if args.profile:
+        print(largest_outputs(results))
+    if args.trace:
+        write_trace(args.trace, results)
+        print(f"Trace written to {args.trace}")
+    return 0 if all(result.ok for result in results.values()) else 1
+
+
+def _watched_files(args, graph):
+    block_files = [block.path for block in graph.blocks.values()]
+    return [args.layer] + block_files + library_files() + (args.data_file or data_files(args.data_dir))
+
+
+def _snapshot(paths):
+    """Modification time per path (None once deleted)"""
+    snapshot = {}
+    for path in paths:
+        try:
+            snapshot[path] = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            snapshot[path] = None
+    return snapshot
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""Content-addressed on-disk cache of block outputs."""
+import glob
+import hashlib
+import os
+import pickle
+
+from canvas_runner.execute import PROJECT_DIR, BlockResult
+from canvas_runner.shared import SharedValue
+
+CACHE_VERSION = 3
+DEFAULT_MAX_BYTES = 2 * 1024**3
+# Helper packages the blocks import; editing them must invalidate block outputs
+LIBRARY_PACKAGES = ('user_success',)
+
+
+def file_fingerprint(paths):
+    """Hash of each file's path, size and modification time.
+
+    Cheap enough to run on every invocation, unlike hashing the contents,
+    and any rewrite of an input file changes it.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(os.path.abspath(p) for p in paths):
+        stat = os.stat(path)
+        digest.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def data_files(data_dir):
+    """Top-level, non-hidden files of the directory blocks read their data from"""
+    data_dir = data_dir or os.getcwd()
+    return [
+        entry.path for entry in os.scandir(data_dir)
+        if entry.is_file() and not entry.name.startswith('.')
+    ]
+
+
+def library_files(packages=LIBRARY_PACKAGES):
+    return [
+        path
+        for package in packages
+        for path in sorted(glob.glob(os.path.join(PROJECT_DIR, package, '**', '*.py'), recursive=True))
+    ]
+
+
+def library_fingerprint(packages=LIBRARY_PACKAGES):
+    digest = hashlib.sha256()
+    for path in library_files(packages):
+        with open(path, 'rb') as f:
+            digest.update(os.path.relpath(path, PROJECT_DIR).encode() + b'\0' + f.read())
+    return digest.hexdigest()
+
+
+class BlockCache:
+    """Block outputs stored under a key of source, upstream keys and data.
+
+    A block's key hashes its source file, the keys of its parent blocks (so
+    an edit anywhere upstream changes every key below it), the input data
+    fingerprint and the helper library sources. Entries are evicted least
+    recently used first once the directory grows past `max_bytes`.
+    """
+
+    def __init__(self, directory, data_fingerprint, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.data_fingerprint = data_fingerprint
+        self.max_bytes = max_bytes
+        self.library_fingerprint = library_fingerprint()
+
+    def key(self, block, parent_keys):
+        digest = hashlib.sha256(f"v{CACHE_VERSION}\0{block.name}\0".encode())
+        with open(block.path, 'rb') as f:
+            digest.update(f.read())
+        for parent_key in parent_keys:
+            digest.update(b'\0' + parent_key.encode())
+        digest.update(f"\0{self.data_fingerprint}\0{self.library_fingerprint}".encode())
+        return digest.hexdigest()
+
+    def _path(self, name, key):
+        # The block name in the file name lets invalidate() find entries
+        return os.path.join(self.directory, f"{name}-{key[:32]}.pkl")
+
+    def get(self, name, key):
+        """The cached BlockResult for `key`, or None"""
+        path = self._path(name, key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if entry.get('key') != key:
+            return None
+        # Bump the mtime so eviction sees the entry as recently used
+        os.utime(path)
+        outputs = {var: SharedValue.from_buffers(meta, buffers) for var, (meta, buffers) in entry['outputs'].items()}
+        return BlockResult(
+            name, 'cached', outputs, entry['stdout'],
+            wall_time=entry['wall_time'], skipped=entry['skipped'], output_info=entry['output_info'],
+        )
+
+    def put(self, key, result):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(result.name, key)
+        entry = {
+            'key': key,
+            'outputs': {var: shared.materialize() for var, shared in result.outputs.items()},
+            'stdout': result.stdout,
+            'wall_time': result.wall_time,
+            'skipped': result.skipped,
+            'output_info': result.output_info,
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def _entries(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return [entry for entry in os.scandir(self.directory) if entry.name.endswith('.pkl')]
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits max_bytes"""
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime_ns)
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            os.remove(entry.path)
+
+    def invalidate(self, names=None):
+        """Remove entries of the given blocks (all entries if None); returns the count"""
+        removed = 0
+        for entry in self._entries():
+            if names is None or entry.name.rsplit('-', 1)[0] in names:
+                os.remove(entry.path)
+                removed += 1
+        return removed
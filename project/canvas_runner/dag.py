@@ -0,0 +1,162 @@
+"""Block graph of a canvas layer, read from layer.yaml or canvas.yaml."""
+import os
+from dataclasses import dataclass, field
+
+import yaml
+
+_SIZE_UNITS = {'': 1, 'B': 1, 'KB': 1024, 'MB': 1024**2, 'GB': 1024**3, 'TB': 1024**4}
+
+
+def parse_size(text):
+    """'500MB' / '2GB' / '1048576' -> bytes"""
+    text = str(text).strip().upper()
+    number = text.rstrip('KMGTB')
+    unit = text[len(number):]
+    if unit not in _SIZE_UNITS:
+        raise ValueError(f"Unknown size unit in {text!r}")
+    return int(float(number) * _SIZE_UNITS[unit])
+
+
+@dataclass
+class Block:
+    """One block of the layer.
+
+    `compute_settings` may give a budget for headless runs, e.g.
+    `{cpus: 8, memory: 4GB}`: the scheduler reserves it while the block runs
+    and caps the block's BLAS/OpenMP and joblib threads at `cpus`.
+    """
+
+    id: str
+    name: str
+    path: str
+    description: str = ''
+    compute_settings: dict = None
+    parents: list = field(default_factory=list)
+
+    @property
+    def cpus(self):
+        """CPU budget, or None when the block does not set one"""
+        cpus = (self.compute_settings or {}).get('cpus')
+        if cpus is None:
+            return None
+        if int(cpus) < 1:
+            raise ValueError(f"Block {self.name!r}: cpus must be at least 1, got {cpus!r}")
+        return int(cpus)
+
+    @property
+    def memory(self):
+        """Memory budget in bytes, or None when the block does not set one"""
+        memory = (self.compute_settings or {}).get('memory')
+        return None if memory is None else parse_size(memory)
+
+
+class LayerGraph:
+    """Blocks of one layer plus the edges between them, in topological order"""
+
+    def __init__(self, name, blocks, edges):
+        self.name = name
+        self.blocks = {block.name: block for block in blocks}
+        by_id = {block.id: block for block in blocks}
+        for edge in edges:
+            source, target = by_id.get(edge['source']), by_id.get(edge['target'])
+            if source is None or target is None:
+                # Edges into other layers are not ours to run
+                continue
+            if source.name not in target.parents:
+                target.parents.append(source.name)
+        self.order = self._topological_order()
+
+    def _topological_order(self):
+        """Kahn's algorithm, breaking ties by YAML order so runs are stable"""
+        remaining = {name: len(block.parents) for name, block in self.blocks.items()}
+        children = {name: [] for name in self.blocks}
+        for name, block in self.blocks.items():
+            for parent in block.parents:
+                children[parent].append(name)
+
+        order = []
+        ready = [name for name, count in remaining.items() if count == 0]
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for child in children[name]:
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ready.append(child)
+        if len(order) != len(self.blocks):
+            stuck = sorted(set(self.blocks) - set(order))
+            raise ValueError(f"Layer {self.name!r} has a cycle through {stuck}")
+        return order
+
+    def ancestors(self, name):
+        """All blocks upstream of `name`, in topological order"""
+        seen = set()
+        stack = list(self.blocks[name].parents)
+        while stack:
+            parent = stack.pop()
+            if parent not in seen:
+                seen.add(parent)
+                stack.extend(self.blocks[parent].parents)
+        return [other for other in self.order if other in seen]
+
+    def descendants(self, name):
+        """All blocks downstream of `name`, in topological order"""
+        seen = {name}
+        for other in self.order:
+            if any(parent in seen for parent in self.blocks[other].parents):
+                seen.add(other)
+        return [other for other in self.order if other in seen and other != name]
+
+    def select(self, targets):
+        """Names to run for `targets`: the targets plus everything upstream"""
+        if not targets:
+            return list(self.order)
+        unknown = sorted(set(targets) - set(self.blocks))
+        if unknown:
+            raise KeyError(f"Unknown blocks {unknown} in layer {self.name!r}")
+        wanted = set(targets)
+        for target in targets:
+            wanted.update(self.ancestors(target))
+        return [name for name in self.order if name in wanted]
+
+
+def _layer_graph(layer, layer_dir):
+    blocks = [
+        Block(
+            id=spec['id'],
+            name=spec['name'],
+            path=os.path.join(layer_dir, spec['name'] + '.py'),
+            description=spec.get('description') or '',
+            compute_settings=spec.get('compute_settings'),
+        )
+        for spec in layer.get('blocks') or []
+    ]
+    return LayerGraph(layer['name'], blocks, layer.get('edges') or [])
+
+
+def load_layer(path, layer_name=None):
+    """Read a layer.yaml, or one layer of a canvas.yaml, into a LayerGraph.
+
+    Block sources are expected next to the layer as `<block name>.py`; for a
+    canvas.yaml that is the `<layer name>/` directory beside it.
+    """
+    with open(path) as f:
+        doc = yaml.safe_load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+
+    if 'layers' not in doc:
+        if layer_name is not None and doc['name'] != layer_name:
+            raise KeyError(f"{path} holds layer {doc['name']!r}, not {layer_name!r}")
+        return _layer_graph(doc, base_dir)
+
+    layers = doc['layers'] or []
+    if layer_name is None:
+        if len(layers) != 1:
+            raise ValueError(f"{path} has {len(layers)} layers; choose one by name")
+        layer = layers[0]
+    else:
+        matches = [layer for layer in layers if layer['name'] == layer_name]
+        if not matches:
+            raise KeyError(f"No layer {layer_name!r} in {path}")
+        layer = matches[0]
+    return _layer_graph(layer, os.path.join(base_dir, layer['name']))
@@ -0,0 +1,190 @@
+"""Running a single block in a worker process."""
+import ast
+import contextlib
+import importlib
+import io
+import os
+import sys
+import traceback
+import types
+
+from canvas_runner.profile import BlockProfiler, describe_output
+from canvas_runner.shared import SharedValue
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+# LOKY_MAX_CPU_COUNT is what joblib resolves n_jobs=-1 against; the others
+# size the thread pools of processes the block starts (e.g. loky workers)
+THREAD_ENV_VARS = ('LOKY_MAX_CPU_COUNT', 'OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS')
+
+# Directory holding the block helper packages (user_success, canvas_runner)
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class BlockResult:
+    """Outcome of one block: its new variables (SharedValue) and captured output.
+
+    `output_info` describes each variable's type, shape and size, and
+    `profile` holds the BlockProfiler stats when the block actually ran.
+    """
+
+    def __init__(self, name, status, outputs=None, stdout='', error=None, wall_time=0.0, skipped=(),
+                 output_info=None, profile=None):
+        self.name = name
+        self.status = status
+        self.outputs = outputs or {}
+        self.stdout = stdout
+        self.error = error
+        self.wall_time = wall_time
+        self.skipped = list(skipped)
+        self.output_info = output_info or {}
+        self.profile = profile
+
+    @property
+    def ok(self):
+        return self.status in ('ok', 'cached')
+
+
+def block_imports(paths):
+    """Modules imported at the top level of the given block files"""
+    modules = []
+    for path in paths:
+        with open(path) as f:
+            tree = ast.parse(f.read(), path)
+        for node in tree.body:
+            if isinstance(node, ast.Import):
+                modules.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+                modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def enable_copy_on_write():
+    """Turn on pandas copy-on-write, the default from pandas 3, so frames
+    overlaid by blocks (user_success.frames) share their upstream columns.
+
+    pandas 2.x reads PANDAS_COPY_ON_WRITE when imported; an already
+    imported pandas 2.x gets the option set. PANDAS_COPY_ON_WRITE=0 in the
+    environment keeps it off.
+    """
+    if os.environ.setdefault('PANDAS_COPY_ON_WRITE', '1') != '1':
+        return
+    pandas = sys.modules.get('pandas')
+    if pandas is not None and int(pandas.__version__.split('.')[0]) < 3:
+        pandas.set_option('mode.copy_on_write', True)
+
+
+def warm_imports(modules):
+    """Import `modules` now so blocks find them in sys.modules.
+
+    Called in the runner before the pool forks, every worker starts with the
+    scientific stack already loaded instead of paying seconds of imports per
+    process. Modules that fail to import are left for the block to report.
+    """
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    enable_copy_on_write()
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except Exception:
+            pass
+
+
+def init_worker(cwd=None, preload=()):
+    """Process initializer: headless plotting, block imports, data directory"""
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+    # No-op after a fork from a warmed parent; does the work under spawn
+    warm_imports(preload)
+    if cwd:
+        os.chdir(cwd)
+
+
+def block_outputs(namespace, inputs):
+    """Variables a block created or rebound, exported to shared memory, with descriptions.
+
+    Also returns the names that would not pickle. Underscore names are
+    block-private, as on the canvas, and modules are re-imported by whichever
+    block needs them.
+    """
+    outputs, info, skipped = {}, {}, []
+    for name, value in namespace.items():
+        if name.startswith('_') or isinstance(value, types.ModuleType):
+            continue
+        if name in inputs and inputs[name] is value:
+            continue
+        try:
+            outputs[name] = SharedValue.export(value)
+        except Exception:
+            skipped.append(name)
+            continue
+        info[name] = describe_output(value, outputs[name].nbytes)
+    return outputs, info, skipped
+
+
+@contextlib.contextmanager
+def cpu_budget(cpus):
+    """Cap the threads and joblib workers a block can start at `cpus`"""
+    if cpus is None:
+        yield
+        return
+    saved = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+    os.environ.update({var: str(cpus) for var in THREAD_ENV_VARS})
+    limits = threadpool_limits(limits=cpus) if threadpool_limits is not None else None
+    try:
+        yield
+    finally:
+        if limits is not None:
+            limits.restore_original_limits()
+        for var, value in saved.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+
+def _close_figures():
+    pyplot = sys.modules.get('matplotlib.pyplot')
+    if pyplot is not None:
+        pyplot.close('all')
+
+
+def run_block(name, path, inputs, cpus=None):
+    """Execute the block at `path` with the upstream variables in `inputs`.
+
+    `inputs` maps variable names to SharedValue handles; their arrays are
+    mapped read-only, so a block that modifies an upstream frame in place must
+    copy it first. `cpus` caps the block's threads (see cpu_budget); None,
+    for a block without a budget, leaves them uncapped. Runs in a pool
+    worker, so it never raises: failures come back as a BlockResult with
+    the traceback.
+    """
+    stdout = io.StringIO()
+    profiler = BlockProfiler()
+    try:
+        with open(path) as f:
+            code = compile(f.read(), path, 'exec')
+        values = {var: shared.load() for var, shared in inputs.items()}
+        namespace = dict(values, __name__='__main__', __file__=path)
+        with cpu_budget(cpus), profiler, contextlib.redirect_stdout(stdout):
+            exec(code, namespace)
+        outputs, info, skipped = block_outputs(namespace, values)
+    except (Exception, SystemExit):
+        stats = profiler.stats() if hasattr(profiler, 'wall_time') else None
+        return BlockResult(
+            name, 'failed', stdout=stdout.getvalue(), error=traceback.format_exc(),
+            wall_time=stats['wall_time'] if stats else 0.0, profile=stats,
+        )
+    finally:
+        _close_figures()
+    stats = profiler.stats()
+    return BlockResult(
+        name, 'ok', outputs, stdout.getvalue(), wall_time=stats['wall_time'],
+        skipped=skipped, output_info=info, profile=stats,
+    )
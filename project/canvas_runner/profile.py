@@ -0,0 +1,180 @@
+"""Per-block resource measurements and Chrome trace export."""
+import json
+import os
+import resource
+import sys
+import threading
+import time
+
+RSS_SAMPLE_INTERVAL = 0.05
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss():
+    """Resident set size of this process in bytes"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        # No procfs (macOS): fall back to the lifetime peak
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class BlockProfiler:
+    """Wall time, CPU time and RSS of the enclosed code.
+
+    A background thread samples RSS every RSS_SAMPLE_INTERVAL seconds, so the
+    peak is per block even though pool workers are reused across blocks (the
+    kernel's ru_maxrss only ever grows). CPU time covers all threads of the
+    worker process, including BLAS and OpenMP threads, but not joblib's
+    separate worker processes.
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.samples.append((time.time(), current_rss()))
+
+    def __enter__(self):
+        self.start = time.time()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self.samples.append((self.start, current_rss()))
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall_time = time.perf_counter() - self._wall
+        self.cpu_time = time.process_time() - self._cpu
+        self._stop.set()
+        self._thread.join()
+        self.samples.append((time.time(), current_rss()))
+        return False
+
+    def stats(self):
+        return {
+            'pid': os.getpid(),
+            'start': self.start,
+            'wall_time': self.wall_time,
+            'cpu_time': self.cpu_time,
+            'peak_rss': max(rss for _, rss in self.samples),
+            'rss_samples': self.samples,
+        }
+
+
+def object_size(value):
+    """In-memory bytes of a block variable, or None when it is not an array-like"""
+    memory_usage = getattr(value, 'memory_usage', None)
+    if callable(memory_usage) and hasattr(value, 'index'):
+        # DataFrame / Series; deep=True counts string payloads of object columns
+        usage = memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+    return None
+
+
+def describe_output(value, pickled_size):
+    """Type, shape and size of one block variable for the profile"""
+    size = object_size(value)
+    shape = getattr(value, 'shape', None)
+    return {
+        'type': type(value).__name__,
+        'shape': list(shape) if isinstance(shape, tuple) else None,
+        'bytes': size if size is not None else pickled_size,
+        'measured': 'memory' if size is not None else 'pickle',
+    }
+
+
+def chrome_trace(results):
+    """Trace Event Format dict for chrome://tracing or ui.perfetto.dev.
+
+    One complete event per executed block on its worker's track, with CPU
+    time, peak RSS and output sizes as arguments, plus an RSS counter track
+    per worker. Cached blocks appear as instant events.
+    """
+    profiles = [r.profile for r in results.values() if r.profile]
+    origin = min((p['start'] for p in profiles), default=time.time())
+
+    def micros(t):
+        return round((t - origin) * 1e6)
+
+    events = [{'name': 'process_name', 'ph': 'M', 'pid': 0, 'args': {'name': 'runner'}}]
+    for pid in sorted({p['pid'] for p in profiles}):
+        events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': f'worker {pid}'}})
+
+    for name, result in results.items():
+        profile = result.profile
+        if profile is None:
+            if result.status == 'cached':
+                events.append({'name': name, 'ph': 'i', 's': 'p', 'pid': 0, 'tid': 0, 'ts': 0,
+                               'args': {'status': 'cached'}})
+            continue
+        events.append({
+            'name': name,
+            'cat': result.status,
+            'ph': 'X',
+            'pid': profile['pid'],
+            'tid': 0,
+            'ts': micros(profile['start']),
+            'dur': round(profile['wall_time'] * 1e6),
+            'args': {
+                'cpu_s': round(profile['cpu_time'], 3),
+                'peak_rss_mb': round(profile['peak_rss'] / 2**20, 1),
+                'outputs': {var: info for var, info in result.output_info.items()},
+            },
+        })
+        for t, rss in profile['rss_samples']:
+            events.append({'name': 'rss_mb', 'ph': 'C', 'pid': profile['pid'], 'ts': micros(t),
+                           'args': {'rss_mb': round(rss / 2**20, 1)}})
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def write_trace(path, results):
+    with open(path, 'w') as f:
+        json.dump(chrome_trace(results), f)
+
+
+def _megabytes(n):
+    return f"{n / 2**20:.1f}"
+
+
+def summary(results, elapsed):
+    """Per-block table of time, CPU, peak RSS and output size, plus totals"""
+    width = max([len(name) for name in results] + [5])
+    header = f"{'block':<{width}}  {'status':<7}  {'wall s':>8}  {'cpu s':>8}  {'peak MB':>8}  {'out MB':>8}"
+    lines = [header]
+    for name, result in results.items():
+        profile = result.profile or {}
+        cpu = f"{profile['cpu_time']:.2f}" if profile else '-'
+        peak = _megabytes(profile['peak_rss']) if profile else '-'
+        out = _megabytes(sum(info['bytes'] for info in result.output_info.values()))
+        lines.append(
+            f"{name:<{width}}  {result.status:<7}  {result.wall_time:>8.2f}  {cpu:>8}  {peak:>8}  {out:>8}"
+        )
+    total = sum(result.wall_time for result in results.values())
+    lines.append(f"{'total':<{width}}  {'':<7}  {total:>8.2f}  (elapsed {elapsed:.2f})")
+    return '\n'.join(lines)
+
+
+def largest_outputs(results, limit=15):
+    """Table of the biggest variables produced across the run"""
+    rows = [
+        (info['bytes'], name, var, info)
+        for name, result in results.items()
+        for var, info in result.output_info.items()
+    ]
+    rows.sort(key=lambda row: row[0], reverse=True)
+    lines = [f"{'variable':<32}  {'block':<30}  {'type':<26}  {'shape':<14}  {'MB':>8}"]
+    for size, name, var, info in rows[:limit]:
+        shape = 'x'.join(str(n) for n in info['shape']) if info['shape'] else ''
+        approx = '' if info['measured'] == 'memory' else ' (pickled)'
+        lines.append(f"{var:<32}  {name:<30}  {info['type']:<26}  {shape:<14}  {_megabytes(size):>8}{approx}")
+    return '\n'.join(lines)
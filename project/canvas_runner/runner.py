@@ -0,0 +1,192 @@
+"""Concurrent execution of a layer's blocks along its DAG."""
+import multiprocessing
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from canvas_runner.cache import LIBRARY_PACKAGES
+from canvas_runner.execute import BlockResult, block_imports, init_worker, run_block, warm_imports
+from canvas_runner.shared import ensure_tracker, release
+
+# Never preloaded: a warm parent would hand every later --watch run the code
+# it imported first, while the cache keys already hash the edited sources
+PROJECT_PACKAGES = LIBRARY_PACKAGES + ('canvas_runner',)
+
+
+def upstream_inputs(graph, name, results):
+    """Variables visible to `name`: outputs of all its ancestors.
+
+    Ancestors are merged in topological order, so a variable rebound further
+    down the chain shadows the earlier value, as on the canvas.
+    """
+    inputs = {}
+    for ancestor in graph.ancestors(name):
+        inputs.update(results[ancestor].outputs)
+    return inputs
+
+
+def _report(result, stream):
+    print(f"=== {result.name} [{result.status}] {result.wall_time:.2f}s ===", file=stream)
+    if result.stdout:
+        print(result.stdout.rstrip('\n'), file=stream)
+    if result.error:
+        print(result.error.rstrip('\n'), file=stream)
+    if result.skipped:
+        print(f"(not passed downstream, unpicklable: {', '.join(result.skipped)})", file=stream)
+
+
+def physical_memory():
+    """Total RAM in bytes (None where sysconf does not report it)"""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+class ResourcePool:
+    """CPU and memory budget the running blocks reserve from.
+
+    A block reserves its compute_settings budget (1 CPU and no memory when
+    it sets none), clamped to the totals so an oversized request still runs,
+    just alone.
+    """
+
+    def __init__(self, cpus, memory):
+        self.cpus = self.free_cpus = cpus
+        self.memory = self.free_memory = memory
+
+    def request(self, block):
+        cpus = min(block.cpus or 1, self.cpus)
+        memory = block.memory or 0
+        if self.memory is not None:
+            memory = min(memory, self.memory)
+        return cpus, memory
+
+    def fits(self, request, idle):
+        cpus, memory = request
+        if idle:
+            return True
+        return cpus <= self.free_cpus and (self.memory is None or memory <= self.free_memory)
+
+    def acquire(self, request):
+        self.free_cpus -= request[0]
+        if self.memory is not None:
+            self.free_memory -= request[1]
+
+    def release(self, request):
+        self.free_cpus += request[0]
+        if self.memory is not None:
+            self.free_memory += request[1]
+
+
+def run_layer(graph, targets=None, workers=None, cwd=None, cache=None, cpus=None, memory=None,
+              preload=True, stream=sys.stdout):
+    """Run the selected blocks of `graph`, each as soon as its parents finish.
+
+    Independent branches run in parallel on up to `workers` processes, so the
+    run takes about as long as the critical path rather than the sum of all
+    blocks. Blocks also wait until the CPU and memory budgets in their
+    compute_settings fit within `cpus` (default: all cores) and `memory`
+    (default: physical RAM), starting in topological order as budget frees
+    up; inside the block, threads and joblib's n_jobs=-1 are capped at the
+    block's CPU budget. A failed block skips everything downstream of it.
+    Each block's printed output is written to `stream` as a unit when it
+    finishes.
+
+    With a BlockCache, blocks whose key is already cached are not run; their
+    variables and output are reloaded from the cache instead.
+
+    With `preload`, the third-party modules the selected blocks import are
+    loaded once in this process before the pool forks, so workers start
+    warm (see warm_imports); calling run_layer again from the same process,
+    as --watch does, reuses them. PROJECT_PACKAGES are left to the workers,
+    which are forked afresh on every call and so import their current
+    source.
+
+    Block variables travel through shared memory (see SharedValue); the
+    segments are released when the run ends, so the returned results keep
+    their printed output and profiles but not their variables.
+
+    Returns {block name: BlockResult} in topological order.
+    """
+    selected = graph.select(targets)
+    resources = ResourcePool(cpus or os.cpu_count() or 1, memory or physical_memory())
+    workers = min(workers or resources.cpus, resources.cpus)
+    results = {}
+
+    # fork keeps worker start-up cheap; the initializer still sets paths and cwd
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    modules = []
+    if preload:
+        modules = [
+            module for module in block_imports(graph.blocks[name].path for name in selected)
+            if module.split('.')[0] not in PROJECT_PACKAGES
+        ]
+    if context.get_start_method() == 'fork':
+        warm_imports(modules)
+    ensure_tracker()
+    try:
+        _schedule(graph, selected, workers, resources, context, (cwd, modules), cache, stream, results)
+    finally:
+        release(shared for result in results.values() for shared in result.outputs.values())
+        for result in results.values():
+            result.outputs = {}
+    return {name: results[name] for name in selected}
+
+
+def _schedule(graph, selected, workers, resources, context, initargs, cache, stream, results):
+    """Submit blocks as their parents finish and budget allows, filling `results`"""
+    keys = {}
+    pending = list(selected)
+    running = {}
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=init_worker, initargs=initargs) as pool:
+        while pending or running:
+            for name in list(pending):
+                parents = graph.blocks[name].parents
+                if any(results.get(p) is not None and not results[p].ok for p in parents):
+                    pending.remove(name)
+                    results[name] = BlockResult(name, 'skipped')
+                    _report(results[name], stream)
+                    continue
+                if not all(p in results for p in parents):
+                    continue
+                block = graph.blocks[name]
+                if cache is not None and name not in keys:
+                    keys[name] = cache.key(block, [keys[p] for p in parents])
+                    cached = cache.get(name, keys[name])
+                    if cached is not None:
+                        pending.remove(name)
+                        results[name] = cached
+                        _report(cached, stream)
+                        continue
+                request = resources.request(block)
+                if len(running) >= workers or not resources.fits(request, idle=not running):
+                    # Start in order: later blocks don't jump a block waiting for budget
+                    break
+                pending.remove(name)
+                resources.acquire(request)
+                inputs = upstream_inputs(graph, name, results)
+                # The 1-CPU default only schedules; only an explicit budget caps threads
+                cap = request[0] if block.cpus is not None else None
+                future = pool.submit(run_block, name, block.path, inputs, cap)
+                running[future] = name, request
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, request = running.pop(future)
+                resources.release(request)
+                try:
+                    results[name] = future.result()
+                except Exception as exc:
+                    # The worker itself died (e.g. out of memory)
+                    results[name] = BlockResult(name, 'failed', error=repr(exc))
+                if cache is not None and results[name].ok:
+                    cache.put(keys[name], results[name])
+                _report(results[name], stream)
+                budget = graph.blocks[name].memory
+                profile = results[name].profile
+                if budget and profile and profile['peak_rss'] > budget:
+                    print(f"warning: {name} peaked at {profile['peak_rss'] / 2**20:.0f} MB, "
+                          f"over its {budget / 2**20:.0f} MB budget", file=stream)
@@ -0,0 +1,103 @@
+"""Block variables handed between processes through shared memory."""
+import pickle
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+# Buffers below this stay inside the pickle; a segment per tiny array costs more
+MIN_SHARED_BYTES = 64 * 1024
+
+# Segments this process has mapped, kept open while arrays may point into them
+_attached = {}
+
+
+class SharedValue:
+    """Picklable handle to a variable whose array buffers live in shared memory.
+
+    The variable is pickled with protocol 5: NumPy arrays, and therefore the
+    numeric blocks of DataFrames and fitted models, hand their data buffers
+    out of band. Each large buffer is copied once into its own segment, and
+    `load` rebuilds the variable on read-only views of those segments, so
+    downstream blocks share the pages instead of unpickling private copies.
+    """
+
+    def __init__(self, meta, segments):
+        self.meta = meta
+        # (segment name, nbytes) per out-of-band buffer, in pickle order
+        self.segments = segments
+
+    @property
+    def nbytes(self):
+        return len(self.meta) + sum(size for _, size in self.segments)
+
+    @classmethod
+    def export(cls, value, min_bytes=MIN_SHARED_BYTES):
+        buffers = []
+
+        def out_of_band(buffer):
+            raw = buffer.raw()
+            if raw.nbytes < min_bytes:
+                return True
+            buffers.append(raw)
+            return False
+
+        meta = pickle.dumps(value, protocol=5, buffer_callback=out_of_band)
+        return cls.from_buffers(meta, buffers)
+
+    @classmethod
+    def from_buffers(cls, meta, buffers):
+        segments = []
+        for buffer in buffers:
+            size = len(memoryview(buffer).cast('B'))
+            shm = SharedMemory(create=True, size=max(size, 1))
+            shm.buf[:size] = memoryview(buffer).cast('B')
+            _attached[shm.name] = shm
+            segments.append((shm.name, size))
+        return cls(meta, segments)
+
+    def buffers(self):
+        """Read-only views of the out-of-band buffers, mapping segments as needed"""
+        views = []
+        for name, size in self.segments:
+            shm = _attached.get(name)
+            if shm is None:
+                shm = _attached[name] = SharedMemory(name=name)
+            views.append(shm.buf[:size].toreadonly())
+        return views
+
+    def load(self):
+        """The variable, with its arrays mapped read-only from shared memory"""
+        return pickle.loads(self.meta, buffers=self.buffers())
+
+    def materialize(self):
+        """(meta, buffer bytes) holding no reference to shared memory, for the cache"""
+        return self.meta, [bytes(view) for view in self.buffers()]
+
+
+def ensure_tracker():
+    """Start the resource tracker before forking workers.
+
+    Workers then share the parent's tracker, so every segment is registered
+    with a tracker that outlives the worker that created it. release() unlinks
+    segments after a run; anything left when the parent dies is unlinked by
+    the tracker.
+    """
+    resource_tracker.ensure_running()
+
+
+def release(values):
+    """Unlink the segments behind `values` once no block will read them"""
+    for value in values:
+        for name, _ in value.segments:
+            shm = _attached.pop(name, None)
+            try:
+                if shm is None:
+                    shm = SharedMemory(name=name)
+                shm.unlink()
+            except FileNotFoundError:
+                continue
+            try:
+                shm.close()
+            except BufferError:
+                # Something in this process still views the segment; the
+                # mapping goes away with it, the name is already unlinked
+                pass
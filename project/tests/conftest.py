@@ -0,0 +1,109 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+EVENT_NAMES = ['$pageview', 'credits_used', 'block_run', 'canvas_open', 'sign_in']
+
+
+def make_events(n_users=40, seed=0):
+    """A small shuffled event log in the export's CSV layout.
+
+    It has missing timestamps, missing session ids and durations, users
+    with a single event and ties in every numeric column.
+    """
+    rng = np.random.default_rng(seed)
+    users = np.array([f"{i:04x}-user" for i in range(n_users)], dtype=object)
+    counts = rng.integers(1, 12, n_users)
+    uid = np.repeat(np.arange(n_users), counts)
+    n = len(uid)
+    event = np.array(EVENT_NAMES, dtype=object)[rng.integers(0, len(EVENT_NAMES), n)]
+    created = pd.Timestamp('2025-09-01', tz='UTC') + pd.to_timedelta(rng.integers(0, 20, n_users), unit='D')
+    timestamp = created[uid] + pd.to_timedelta(rng.integers(0, 5 * 86_400, n), unit='s')
+    timestamp = pd.Series(timestamp).dt.strftime('%Y-%m-%dT%H:%M:%S.%fZ').to_numpy(dtype=object)
+    timestamp[rng.random(n) < 0.1] = np.nan
+    session = np.array([f"s{u}-{k}" for u, k in zip(uid, rng.integers(0, 3, n))], dtype=object)
+    session[rng.random(n) < 0.15] = np.nan
+    duration = rng.integers(0, 5, n) * 1000.0
+    duration[rng.random(n) < 0.1] = np.nan
+    credits = np.where(event == 'credits_used', rng.integers(1, 4, n), np.nan)
+    order = rng.permutation(n)
+    return pd.DataFrame({
+        'uuid': np.arange(n),
+        'event': event,
+        'person_id': users[uid],
+        'timestamp': timestamp,
+        'created_at': pd.Series(created[uid]).dt.strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+        'prop_$session_id': session,
+        'prop_$sdk_debug_current_session_duration': duration,
+        'prop_credits_used': credits,
+    }).iloc[order].reset_index(drop=True)
+
+
+def make_users(n=500, seed=0):
+    """A user feature table with ties, missing session durations and a
+    constant (all zero) credit column"""
+    rng = np.random.default_rng(seed)
+    users = pd.DataFrame({
+        'active_days': rng.integers(0, 6, n),
+        'unique_event_types': rng.integers(1, 6, n),
+        'total_events': rng.integers(1, 40, n),
+        'avg_session_duration_ms': rng.choice([0.0, 60_000.0, 120_000.0, 500_000.0], n),
+        'total_credits_used': np.zeros(n),
+    })
+    users.loc[::17, 'avg_session_duration_ms'] = np.nan
+    return users
+
+
+@pytest.fixture
+def events_csv(tmp_path):
+    path = tmp_path / 'events.csv'
+    make_events().to_csv(path, index=False)
+    return str(path)
+
+
+def baseline_engineered_features(df):
+    """The original merge-based feature_engineering block, as the reference
+    every engine is compared with"""
+    df = df.copy()
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')
+    event_counts = df.groupby('person_id').size().reset_index(name='total_events')
+    unique_events = df.groupby('person_id')['event'].nunique().reset_index(name='unique_event_types')
+    session_duration = df.groupby(['person_id', 'prop_$session_id'])['prop_$sdk_debug_current_session_duration'].max().reset_index()
+    avg_session_duration = session_duration.groupby('person_id')['prop_$sdk_debug_current_session_duration'].mean().reset_index(name='avg_session_duration_ms')
+    credits_used = df.groupby('person_id')['prop_credits_used'].sum().reset_index(name='total_credits_used')
+    credit_transactions = df[df['prop_credits_used'].notna()].groupby('person_id').size().reset_index(name='credit_transaction_count')
+    df['date'] = df['timestamp'].dt.date
+    active_days = df.groupby('person_id')['date'].nunique().reset_index(name='active_days')
+    events_per_day = event_counts.merge(active_days, on='person_id')
+    events_per_day['events_per_day'] = events_per_day['total_events'] / events_per_day['active_days']
+
+    engineered_features = event_counts.merge(unique_events, on='person_id', how='left')
+    engineered_features = engineered_features.merge(avg_session_duration, on='person_id', how='left')
+    engineered_features = engineered_features.merge(credits_used, on='person_id', how='left')
+    engineered_features = engineered_features.merge(credit_transactions, on='person_id', how='left')
+    engineered_features = engineered_features.merge(active_days, on='person_id', how='left')
+    engineered_features = engineered_features.merge(events_per_day[['person_id', 'events_per_day']], on='person_id', how='left')
+    return engineered_features.fillna(0)
+
+
+def assert_features_equal(result, expected, **kwargs):
+    """Compare engineered_features tables by value, ignoring the person_id
+    string dtype and integer widths"""
+    result = result.reset_index(drop=True)
+    expected = expected.reset_index(drop=True)
+    assert result['person_id'].astype(str).tolist() == expected['person_id'].astype(str).tolist()
+    pd.testing.assert_frame_equal(
+        result.drop(columns='person_id').astype('float64'),
+        expected.drop(columns='person_id').astype('float64'),
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def events():
+    return make_events()
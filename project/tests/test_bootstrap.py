@@ -0,0 +1,80 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from user_success.bootstrap import STATISTICS, bootstrap_effects
+
+
+def _features(n=120, seed=1):
+    rng = np.random.default_rng(seed)
+    features = pd.DataFrame({
+        'ties': rng.integers(0, 5, n).astype(float),
+        'normal': rng.normal(size=n),
+        'constant': np.full(n, 2.0),
+    })
+    features.loc[rng.choice(n, 15), 'normal'] = np.nan
+    return features, rng.random(n) < 0.3
+
+
+def _naive_intervals(features, in_group, n_resamples, seed, confidence=0.95):
+    """Resample each group with pandas, drawing with the same per-resample
+    generators as bootstrap_effects"""
+    a = features[in_group].reset_index(drop=True)
+    b = features[~in_group].reset_index(drop=True)
+    draws = {statistic: [] for statistic in STATISTICS}
+    for child in np.random.SeedSequence(seed).spawn(n_resamples):
+        generator = np.random.default_rng(child)
+        sample_a = a.iloc[generator.integers(0, len(a), len(a))]
+        sample_b = b.iloc[generator.integers(0, len(b), len(b))]
+        row = {statistic: [] for statistic in STATISTICS}
+        for column in features:
+            x, y = sample_a[column].dropna(), sample_b[column].dropna()
+            diff = x.mean() - y.mean()
+            pooled = np.sqrt(((len(x) - 1) * x.var() + (len(y) - 1) * y.var()) / (len(x) + len(y) - 2))
+            average = np.sqrt((x.var() + y.var()) / 2)
+            row['mean_diff'].append(diff)
+            row['median_diff'].append(x.median() - y.median())
+            row['cohens_d'].append(diff / pooled if pooled > 0 else 0.0)
+            row['cohens_d_avg'].append(diff / average if average > 0 else 0.0)
+        for statistic in STATISTICS:
+            draws[statistic].append(row[statistic])
+    tail = (1 - confidence) / 2
+    return {statistic: np.quantile(np.array(values), [tail, 1 - tail], axis=0) for statistic, values in draws.items()}
+
+
+def test_matches_naive_bootstrap_for_any_chunking_and_workers():
+    features, in_group = _features()
+    result = bootstrap_effects(features, in_group, n_resamples=60, seed=5, max_bytes=20_000)
+    expected = _naive_intervals(features, in_group, n_resamples=60, seed=5)
+    for statistic, (low, high) in expected.items():
+        np.testing.assert_allclose(result[statistic + '_low'], low, atol=1e-12)
+        np.testing.assert_allclose(result[statistic + '_high'], high, atol=1e-12)
+    assert (result.loc['constant', ['cohens_d_low', 'cohens_d_high']] == 0).all()
+
+    in_two_workers = bootstrap_effects(features, in_group, n_resamples=60, seed=5, workers=2)
+    pd.testing.assert_frame_equal(in_two_workers, result)
+
+
+def test_empty_groups_and_features_get_nan_intervals():
+    features, in_group = _features()
+    features['missing_in_a'] = np.where(in_group, np.nan, 1.0)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        result = bootstrap_effects(features, in_group, n_resamples=20)
+        empty_group = bootstrap_effects(features, np.zeros(len(features), dtype=bool), n_resamples=20)
+    bounds = [statistic + side for statistic in STATISTICS for side in ('_low', '_high')]
+    assert result.loc['missing_in_a', bounds].isna().all()
+    assert result.loc['normal', bounds].notna().all()
+    assert empty_group[bounds].isna().all().all()
+    assert len(bootstrap_effects(features.iloc[:0], [], n_resamples=5)) == len(features.columns)
+
+
+@pytest.mark.parametrize('confidence', [0.5, 0.9])
+def test_intervals_contain_the_estimate(confidence):
+    features, in_group = _features(n=400, seed=2)
+    result = bootstrap_effects(features, in_group, columns=['ties', 'normal'], n_resamples=200, confidence=confidence)
+    for statistic in ('mean_diff', 'cohens_d'):
+        assert (result[statistic + '_low'] <= result[statistic]).all()
+        assert (result[statistic] <= result[statistic + '_high']).all()
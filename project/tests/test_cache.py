@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from canvas_runner import cache as cache_module
+from canvas_runner.cache import BlockCache
+from canvas_runner.dag import Block
+from canvas_runner.execute import BlockResult
+from canvas_runner.shared import SharedValue, release
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    """A stand-in project directory whose user_success package tests can edit"""
+    project = tmp_path / 'project'
+    (project / 'user_success').mkdir(parents=True)
+    (project / 'user_success' / 'scoring.py').write_text("WEIGHT = 1\n")
+    monkeypatch.setattr(cache_module, 'PROJECT_DIR', str(project))
+    return project / 'user_success'
+
+
+@pytest.fixture
+def block(tmp_path):
+    path = tmp_path / 'block.py'
+    path.write_text("x = 1\n")
+    return Block('1', 'block', str(path))
+
+
+def _put(cache, key, name, **outputs):
+    result = BlockResult(name, 'ok', {var: SharedValue.export(value) for var, value in outputs.items()}, 'printed\n')
+    cache.put(key, result)
+    release(result.outputs.values())
+
+
+def test_key_changes_with_every_input(tmp_path, library, block):
+    cache = BlockCache(str(tmp_path / 'cache'), 'data-1')
+    key = cache.key(block, ['parent-1'])
+    assert cache.key(block, ['parent-1']) == key
+    assert cache.key(block, ['parent-2']) != key
+    assert BlockCache(str(tmp_path / 'cache'), 'data-2').key(block, ['parent-1']) != key
+
+    (library / 'scoring.py').write_text("WEIGHT = 2\n")
+    assert BlockCache(str(tmp_path / 'cache'), 'data-1').key(block, ['parent-1']) != key
+    (library / 'scoring.py').write_text("WEIGHT = 1\n")
+    assert BlockCache(str(tmp_path / 'cache'), 'data-1').key(block, ['parent-1']) == key
+
+    with open(block.path, 'a') as f:
+        f.write("y = 2\n")
+    assert cache.key(block, ['parent-1']) != key
+
+
+def test_round_trip_and_invalidate(tmp_path, library, block):
+    cache = BlockCache(str(tmp_path / 'cache'), 'data')
+    key = cache.key(block, [])
+    # Large enough for its column buffers to go through shared memory
+    frame = pd.DataFrame({'a': np.arange(100_000), 'b': 'x'})
+    _put(cache, key, 'block', frame=frame, value=3)
+
+    cached = cache.get('block', key)
+    assert cached.status == 'cached' and cached.stdout == 'printed\n'
+    assert cached.outputs['frame'].segments
+    pd.testing.assert_frame_equal(cached.outputs['frame'].load(), frame)
+    assert cached.outputs['value'].load() == 3
+    release(cached.outputs.values())
+    assert cache.get('block', 'other-key') is None
+
+    other = Block('2', 'other', block.path)
+    _put(cache, cache.key(other, []), 'other', value=4)
+    assert cache.invalidate({'block'}) == 1
+    assert cache.get('block', key) is None
+    assert cache.get('other', cache.key(other, [])).outputs['value'].load() == 4
+    assert cache.invalidate() == 1
+
+
+def test_evicts_least_recently_used(tmp_path, library, block):
+    cache = BlockCache(str(tmp_path / 'cache'), 'data', max_bytes=10**9)
+    names = ['first', 'second', 'third']
+    for age, name in enumerate(names):
+        _put(cache, name, name, values=np.zeros(1000))
+        path = cache._path(name, name)
+        os.utime(path, ns=(age * 10**9, age * 10**9))
+    cache.get('first', 'first')
+
+    cache.max_bytes = 2 * os.path.getsize(cache._path('first', 'first'))
+    cache.evict()
+    assert sorted(entry.name for entry in cache._entries()) == sorted(
+        os.path.basename(cache._path(name, name)) for name in ['first', 'third']
+    )
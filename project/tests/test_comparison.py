@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+scipy_stats = pytest.importorskip('scipy.stats')
+from user_success.comparison import compare_groups  # noqa: E402
+
+
+def _features(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    features = pd.DataFrame({
+        'continuous': rng.lognormal(size=n),
+        'ties': rng.integers(0, 4, n).astype(float),
+        'constant': np.full(n, 0.1),
+        'sparse': np.where(rng.random(n) < 0.7, np.nan, rng.normal(size=n)),
+    })
+    in_group = rng.random(n) < 0.3
+    # Each group constant on its own, at different values
+    features['split_constant'] = np.where(in_group, 0.1, 0.3)
+    return features, in_group
+
+
+def test_matches_scipy_and_pandas():
+    features, in_group = _features()
+    result = compare_groups(features, in_group, batch_cells=2 * len(features))
+
+    for column in ['continuous', 'ties', 'sparse']:
+        a = features.loc[in_group, column].dropna()
+        b = features.loc[~in_group, column].dropna()
+        row = result.loc[column]
+        assert (row['n_a'], row['n_b']) == (len(a), len(b))
+        assert row['mean_a'] == pytest.approx(a.mean())
+        assert row['median_b'] == pytest.approx(b.median())
+        assert row['std_a'] == pytest.approx(a.std())
+        student = scipy_stats.ttest_ind(a, b)
+        welch = scipy_stats.ttest_ind(a, b, equal_var=False)
+        mann_whitney = scipy_stats.mannwhitneyu(a, b, alternative='two-sided', method='asymptotic')
+        assert row['t_stat'] == pytest.approx(student.statistic)
+        assert row['t_pvalue'] == pytest.approx(student.pvalue)
+        assert row['welch_t'] == pytest.approx(welch.statistic)
+        assert row['welch_pvalue'] == pytest.approx(welch.pvalue)
+        assert row['mannwhitney_u'] == pytest.approx(mann_whitney.statistic)
+        assert row['mannwhitney_pvalue'] == pytest.approx(mann_whitney.pvalue)
+        pooled = np.sqrt(((len(a) - 1) * a.var() + (len(b) - 1) * b.var()) / (len(a) + len(b) - 2))
+        assert row['cohens_d'] == pytest.approx((a.mean() - b.mean()) / pooled)
+
+
+def test_constant_groups_have_exactly_zero_spread():
+    features, in_group = _features()
+    with np.errstate(all='raise'):
+        result = compare_groups(features, in_group)
+    for column in ['constant', 'split_constant']:
+        row = result.loc[column]
+        assert row['std_a'] == 0 and row['std_b'] == 0
+        assert row['cohens_d'] == 0 and row['cohens_d_avg'] == 0
+    assert np.isnan(result.loc['constant', 't_stat'])
+    assert result.loc['split_constant', 't_stat'] == -np.inf
+    assert result.loc['split_constant', 'median_a'] == 0.1
+
+
+def test_empty_and_single_member_groups():
+    features = pd.DataFrame({'x': [1.0, 2.0, np.nan, 4.0], 'y': [np.nan, np.nan, 3.0, 5.0]})
+    result = compare_groups(features, [True, True, False, False])
+    assert result.loc['x', 'n_b'] == 1 and np.isnan(result.loc['x', 'std_b'])
+    assert result.loc['x', 'median_b'] == 4.0
+    assert result.loc['y', 'n_a'] == 0
+    assert np.isnan(result.loc['y', ['mean_a', 'median_a', 'std_a']]).all()
+    assert result.loc['y', 'median_b'] == 4.0
+    assert np.isnan(result.loc['y', 'cohens_d'])
+
+    empty = compare_groups(features.iloc[:0], np.zeros(0, dtype=bool))
+    assert (empty['n_a'] == 0).all() and empty['median_a'].isna().all()
@@ -0,0 +1,115 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from user_success.events import (
+    CATEGORICAL_COLUMNS,
+    cache_path_for,
+    day_numbers,
+    load_events,
+    parse_iso_timestamps,
+    parse_timestamps,
+)
+
+
+def test_parse_iso_timestamps_matches_pandas():
+    values = pd.Series([
+        '2025-09-01T10:00:00.123456Z', None, '2024-02-29T23:59:59.000001Z', '2025-09-01T10:00:00.123456Z',
+    ])
+    parsed = parse_iso_timestamps(values)
+    expected = pd.to_datetime(values, format='ISO8601')
+    assert parsed.isna().tolist() == expected.isna().tolist()
+    assert (parsed.dropna() == expected.dropna()).all()
+
+
+def test_parse_iso_timestamps_falls_back_on_mixed_layouts():
+    values = pd.Series(['2025-09-01T10:00:00Z', '2025-09-01 10:00:00.5+00:00'])
+    expected = pd.to_datetime(values, format='ISO8601')
+    assert (parse_iso_timestamps(values) == expected).all()
+
+
+def test_day_numbers_marks_missing_with_minus_one():
+    timestamps = pd.to_datetime(pd.Series(['1970-01-02T00:00:00Z', None, '1969-12-31T23:00:00Z']), format='ISO8601')
+    np.testing.assert_array_equal(day_numbers(timestamps), [1, -1, -1])
+
+
+def test_cached_load_matches_csv_load(events_csv, tmp_path):
+    direct = load_events(events_csv, use_cache=False)
+    first = load_events(events_csv, cache_dir=str(tmp_path / 'cache'))
+    cached = load_events(events_csv, cache_dir=str(tmp_path / 'cache'))
+    assert os.path.exists(cache_path_for(events_csv, str(tmp_path / 'cache')))
+    pd.testing.assert_frame_equal(first, direct)
+    pd.testing.assert_frame_equal(cached, direct)
+
+
+def test_refresh_removes_only_the_same_sources_stale_caches(events_csv, tmp_path):
+    cache_dir = tmp_path / 'cache'
+    other = tmp_path / 'events-vip.csv'
+    other.write_text(open(events_csv).read())
+    load_events(events_csv, cache_dir=str(cache_dir))
+    load_events(str(other), cache_dir=str(cache_dir))
+    stale = cache_path_for(events_csv, str(cache_dir))
+
+    os.utime(events_csv, ns=(0, os.stat(events_csv).st_mtime_ns + 10**9))
+    load_events(events_csv, cache_dir=str(cache_dir))
+
+    assert not os.path.exists(stale)
+    assert sorted(os.listdir(cache_dir)) == sorted([
+        os.path.basename(cache_path_for(events_csv, str(cache_dir))),
+        os.path.basename(cache_path_for(str(other), str(cache_dir))),
+    ])
+
+
+def test_categorical_columns_keep_values_with_sorted_dictionaries(events_csv):
+    raw = pd.read_csv(events_csv)
+    loaded = load_events(events_csv, use_cache=False)
+    for column in CATEGORICAL_COLUMNS:
+        assert isinstance(loaded[column].dtype, pd.CategoricalDtype)
+        categories = loaded[column].cat.categories
+        assert categories.is_monotonic_increasing and categories.is_unique
+        assert loaded[column].astype(object).where(loaded[column].notna(), None).tolist() == \
+            raw[column].astype(object).where(raw[column].notna(), None).tolist()
+
+
+def test_parse_iso_timestamps_layouts_and_repeats():
+    for values in [
+        ['2025-09-01 10:00:00', '2025-09-02 11:30:15', '2025-09-01 10:00:00'] * 5,
+        ['2025-09-01T10:00:00+00:00', None, '2025-12-31T23:59:59+00:00'] * 5,
+        ['2025-09-01T10:00:00.5Z', '2025-09-01T10:00:00.25Z'],
+    ]:
+        values = pd.Series(values)
+        parsed = parse_iso_timestamps(values)
+        expected = pd.to_datetime(values, format='ISO8601')
+        assert parsed.isna().tolist() == expected.isna().tolist()
+        assert (parsed.dropna() == expected.dropna()).all()
+
+
+def test_parse_timestamps_date_column_matches_calendar_dates(events):
+    parsed = parse_timestamps(events.copy())
+    timestamps = pd.to_datetime(events['timestamp'], format='ISO8601')
+    expected = [(day - pd.Timestamp('1970-01-01').date()).days if pd.notna(day) else -1
+                for day in timestamps.dt.date]
+    assert parsed['date'].tolist() == expected
+
+
+@pytest.mark.parametrize('values', [
+    ['2025-09-01 10:00:00', '2025-09-01 10:00:00.750000'],
+    ['2025-09-01T10:00:00.5', '2025-09-01T10:00:00.123456'],
+    ['2025-09-01T10:00:00.123456', '2025-09-01T10:00:00.5', '2025-09-01T10:00:00'],
+    ['2025-09-01T10:00:00', '2025-09-01T10:00:00+05:00'],
+    ['2025-09-01T10:00:00+00:00', '2025-09-01T10:00:00+05:00'],
+    ['2025-09-01T10:00:00+05:00', '2025-09-01T10:00:00'],
+])
+def test_parse_iso_timestamps_mixed_widths_and_offsets_match_pandas(values):
+    values = pd.Series(values * 3)
+    try:
+        expected = pd.to_datetime(values, format='ISO8601')
+    except ValueError:
+        with pytest.raises(ValueError):
+            parse_iso_timestamps(values)
+        return
+    parsed = parse_iso_timestamps(values)
+    assert parsed.dtype == expected.dtype
+    assert (parsed == expected).all()
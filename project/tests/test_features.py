@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from conftest import assert_features_equal, baseline_engineered_features, make_events
+from user_success.events import load_events, parse_timestamps
+from user_success.features import FEATURE_COLUMNS, compute_engineered_features
+
+
+def test_matches_baseline_on_csv_frame(events):
+    expected = baseline_engineered_features(events)
+    assert list(expected.columns) == ['person_id'] + FEATURE_COLUMNS
+    assert_features_equal(compute_engineered_features(parse_timestamps(events.copy())), expected)
+
+
+def test_matches_baseline_on_loaded_events(events_csv):
+    expected = baseline_engineered_features(pd.read_csv(events_csv))
+    assert_features_equal(compute_engineered_features(load_events(events_csv, use_cache=False)), expected)
+
+
+def test_user_without_timestamps_or_sessions():
+    events = make_events(n_users=5, seed=1)
+    only = events['person_id'] == events['person_id'].iloc[0]
+    events.loc[only, ['timestamp', 'prop_$session_id', 'prop_credits_used']] = np.nan
+    expected = baseline_engineered_features(events)
+    result = compute_engineered_features(parse_timestamps(events.copy()))
+    assert_features_equal(result, expected)
+    row = result[result['person_id'] == events['person_id'].iloc[0]].iloc[0]
+    assert row['active_days'] == 0 and row['avg_session_duration_ms'] == 0
+
+
+def test_ignores_unused_categories(events):
+    expected = baseline_engineered_features(events[events['person_id'] != events['person_id'].iloc[0]])
+    events = parse_timestamps(events)
+    events['person_id'] = events['person_id'].astype('category')
+    subset = events[events['person_id'] != events['person_id'].iloc[0]]
+    assert_features_equal(compute_engineered_features(subset), expected)
@@ -0,0 +1,61 @@
+import contextlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from canvas_runner.execute import enable_copy_on_write
+from user_success import frames
+from user_success.frames import copy_on_write_enabled, overlay
+
+
+def _frame():
+    return pd.DataFrame({'active_days': np.arange(5.0), 'total_events': np.arange(5) * 3})
+
+
+@contextlib.contextmanager
+def _copy_on_write():
+    """Copy-on-write on, whatever the pandas version"""
+    if int(pd.__version__.split('.')[0]) >= 3:
+        yield
+    else:
+        with pd.option_context('mode.copy_on_write', True):
+            yield
+
+
+@pytest.mark.parametrize('cow', [True, False])
+def test_adding_and_writing_columns_leaves_upstream_unchanged(cow, monkeypatch):
+    monkeypatch.setattr(frames, 'copy_on_write_enabled', lambda: cow)
+    upstream = _frame()
+    expected = upstream.copy()
+    with _copy_on_write() if cow else contextlib.nullcontext():
+        result = overlay(upstream)
+        result['events_per_day'] = result['total_events'] / result['active_days']
+        result.loc[0, 'active_days'] = 99.0
+    pd.testing.assert_frame_equal(upstream, expected)
+    assert result['active_days'].iloc[0] == 99.0
+    assert 'events_per_day' in result and 'events_per_day' not in upstream
+
+
+def test_columns_shared_under_copy_on_write():
+    upstream = _frame()
+    with _copy_on_write():
+        assert copy_on_write_enabled()
+        result = overlay(upstream)
+        result['events_per_day'] = result['total_events'] / result['active_days']
+        for column in upstream.columns:
+            assert np.shares_memory(result[column].to_numpy(), upstream[column].to_numpy())
+
+
+def test_columns_copied_without_copy_on_write(monkeypatch):
+    monkeypatch.setattr(frames, 'copy_on_write_enabled', lambda: False)
+    upstream = _frame()
+    result = overlay(upstream)
+    for column in upstream.columns:
+        assert not np.shares_memory(result[column].to_numpy(), upstream[column].to_numpy())
+
+
+def test_runner_turns_copy_on_write_on(monkeypatch):
+    monkeypatch.delenv('PANDAS_COPY_ON_WRITE', raising=False)
+    enable_copy_on_write()
+    assert copy_on_write_enabled()
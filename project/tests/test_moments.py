@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from user_success.moments import GroupedMoments, Moments
+
+
+def _table(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    table = pd.DataFrame({
+        'skewed': rng.lognormal(size=n),
+        'ties': rng.integers(0, 3, n).astype(float),
+        'constant': np.full(n, 0.1),
+        'large': 1e9 + rng.normal(size=n),
+    })
+    table.loc[rng.choice(n, 40), 'skewed'] = np.nan
+    table['tier'] = pd.Categorical(rng.choice(['Low', 'High', 'Medium'], n), categories=['Low', 'Medium', 'High'])
+    table.loc[:4, 'tier'] = np.nan
+    return table
+
+
+def _plain(frame):
+    # GroupedMoments keys its groups (in category order) by a plain index
+    return frame.set_axis(frame.index.astype(str), axis=0)
+
+
+def _fed(table, columns, chunk_rows):
+    moments = Moments(columns)
+    for start in range(0, len(table), chunk_rows):
+        moments.update(table.iloc[start:start + chunk_rows])
+    return moments
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 37, 10_000])
+def test_matches_pandas_for_any_chunking(chunk_rows):
+    table = _table()
+    columns = ['skewed', 'ties', 'constant', 'large']
+    moments = _fed(table, columns, chunk_rows)
+    values = table[columns]
+
+    pd.testing.assert_series_equal(moments.count(), values.count())
+    pd.testing.assert_series_equal(moments.mean(), values.mean())
+    pd.testing.assert_series_equal(moments.std(), values.std(), rtol=1e-9)
+    pd.testing.assert_series_equal(moments.skew(), values.skew(), rtol=1e-6, atol=1e-5)
+    pd.testing.assert_series_equal(moments.kurtosis(), values.kurtosis(), rtol=1e-6, atol=1e-5)
+    assert moments.std()['constant'] == pytest.approx(0, abs=1e-12)
+    assert moments.skew()['constant'] == 0 and moments.kurtosis()['constant'] == 0
+
+    complete = values.dropna()
+    pd.testing.assert_frame_equal(moments.cov(), complete.cov(), rtol=1e-6, atol=1e-5)
+    varying = ['skewed', 'ties', 'large']
+    pd.testing.assert_frame_equal(moments.corr().loc[varying, varying], complete[varying].corr(), rtol=1e-6, atol=1e-5)
+    assert moments.corr()['constant'].isna().all()
+
+
+def test_normaltest_matches_scipy():
+    scipy_stats = pytest.importorskip('scipy.stats')
+    table = _table(seed=1)
+    moments = _fed(table, ['skewed', 'ties'], 64)
+    statistic, p_value = moments.normaltest()
+    for column in ['skewed', 'ties']:
+        expected = scipy_stats.normaltest(table[column].dropna())
+        assert statistic[column] == pytest.approx(expected.statistic)
+        assert p_value[column] == pytest.approx(expected.pvalue)
+    assert _fed(table.iloc[:5], ['ties'], 5).normaltest()[0].isna().all()
+
+
+def test_grouped_matches_groupby_and_merges():
+    table = _table()
+    columns = ['skewed', 'ties']
+    left, right = GroupedMoments(columns), GroupedMoments(columns)
+    left.update(table.iloc[:200], table['tier'].iloc[:200])
+    right.update(table.iloc[200:], table['tier'].iloc[200:])
+    left.merge(right)
+
+    grouped = table.groupby('tier', observed=True)[columns]
+    pd.testing.assert_frame_equal(left.mean(), _plain(grouped.mean()))
+    pd.testing.assert_frame_equal(left.std(), _plain(grouped.std()), rtol=1e-9)
+    pd.testing.assert_frame_equal(left.count(), _plain(grouped.count()), check_dtype=False)
+
+
+def test_empty_accumulator():
+    moments = Moments(['x'])
+    moments.update(pd.DataFrame({'x': [np.nan, np.nan]}))
+    assert moments.count()['x'] == 0
+    assert np.isnan([moments.mean()['x'], moments.std()['x'], moments.skew()['x']]).all()
@@ -0,0 +1,14 @@
+import pandas as pd
+import pytest
+
+from conftest import assert_features_equal, baseline_engineered_features
+from user_success.events import load_events
+from user_success.features import compute_engineered_features, parallel_engineered_features
+
+
+@pytest.mark.parametrize('n_workers', [1, 2, 3])
+def test_partitioned_features_match_baseline(events_csv, n_workers):
+    events = load_events(events_csv, use_cache=False)
+    result = parallel_engineered_features(events, n_workers)
+    assert_features_equal(result, baseline_engineered_features(pd.read_csv(events_csv)))
+    pd.testing.assert_frame_equal(result, compute_engineered_features(events))
@@ -0,0 +1,45 @@
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from canvas_runner.execute import BlockResult, run_block
+from canvas_runner.profile import BlockProfiler, describe_output, summary, write_trace
+from canvas_runner.shared import release
+
+
+def test_profiler_measures_time_and_peak_memory():
+    with BlockProfiler(interval=0.01) as profiler:
+        block = np.ones(64 * 2**20 // 8)
+        # Held long enough for the sampling thread to see it
+        time.sleep(0.1)
+        del block
+    stats = profiler.stats()
+    assert stats['wall_time'] >= 0.1
+    assert stats['peak_rss'] - stats['rss_samples'][0][1] >= 32 * 2**20
+
+
+def test_describe_output_measures_frames_in_memory():
+    frame = pd.DataFrame({'a': np.arange(10), 'b': list('abcdefghij')})
+    assert describe_output(frame, 1) == {
+        'type': 'DataFrame', 'shape': [10, 2], 'bytes': int(frame.memory_usage(deep=True).sum()), 'measured': 'memory',
+    }
+    assert describe_output({'a': 1}, 123)['measured'] == 'pickle'
+
+
+def test_trace_has_one_event_per_block(tmp_path):
+    path = tmp_path / 'block.py'
+    path.write_text("import numpy as np\nvalues = np.arange(1000)\n")
+    result = run_block('block', str(path), {})
+    release(result.outputs.values())
+    results = {'block': result, 'cached': BlockResult('cached', 'cached')}
+
+    trace_path = tmp_path / 'trace.json'
+    write_trace(str(trace_path), results)
+    events = json.loads(trace_path.read_text())['traceEvents']
+    complete = [event for event in events if event['ph'] == 'X']
+    assert [event['name'] for event in complete] == ['block']
+    assert complete[0]['args']['outputs']['values']['bytes'] == 8000
+    assert [event['name'] for event in events if event['ph'] == 'i'] == ['cached']
+    assert summary(results, 1.0).splitlines()[1].split()[:2] == ['block', 'ok']
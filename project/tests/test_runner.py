@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+
+from canvas_runner.cache import BlockCache
+from canvas_runner.dag import Block, LayerGraph
+from canvas_runner.execute import PROJECT_DIR
+from canvas_runner.runner import run_layer
+
+PRELOAD_SCRIPT = """
+import os, sys
+from canvas_runner.dag import Block, LayerGraph
+from canvas_runner.runner import run_layer
+graph = LayerGraph('test', [Block('1', 'block', sys.argv[1])], [])
+with open(os.devnull, 'w') as devnull:
+    results = run_layer(graph, workers=1, stream=devnull)
+print(results['block'].status, 'numpy' in sys.modules, 'user_success' in sys.modules)
+"""
+
+
+def test_preload_warms_third_party_modules_only(tmp_path):
+    block = tmp_path / 'block.py'
+    block.write_text("import numpy as np\nfrom user_success.events import CACHE_VERSION\nversion = CACHE_VERSION\n")
+    output = subprocess.run(
+        [sys.executable, '-c', PRELOAD_SCRIPT, str(block)],
+        cwd=PROJECT_DIR, capture_output=True, text=True, check=True,
+    ).stdout
+    # The parent never holds user_success, so a --watch rerun forks workers
+    # that import the edited library rather than a stale copy
+    assert output.split() == ['ok', 'True', 'False']
+
+
+def _layer(tmp_path, sources):
+    """A chain of blocks a -> b -> ... with the given sources"""
+    blocks = []
+    for name, source in sources.items():
+        path = tmp_path / f"{name}.py"
+        path.write_text(source)
+        blocks.append(Block(name, name, str(path)))
+    edges = [{'source': a.id, 'target': b.id} for a, b in zip(blocks, blocks[1:])]
+    return LayerGraph('test', blocks, edges)
+
+
+def _statuses(graph, cache):
+    with open(os.devnull, 'w') as devnull:
+        results = run_layer(graph, workers=1, cache=cache, preload=False, stream=devnull)
+    return {name: result.status for name, result in results.items()}
+
+
+def test_cached_rerun_and_upstream_edit(tmp_path):
+    graph = _layer(tmp_path, {'a': "x = 1\n", 'b': "y = x + 1\n", 'c': "print(y)\n"})
+    cache = BlockCache(str(tmp_path / 'cache'), 'data')
+    assert _statuses(graph, cache) == {'a': 'ok', 'b': 'ok', 'c': 'ok'}
+    assert _statuses(graph, cache) == {'a': 'cached', 'b': 'cached', 'c': 'cached'}
+
+    # An edit re-runs the block and everything below it, with the new value
+    (tmp_path / 'b.py').write_text("y = x + 2\n")
+    assert _statuses(graph, cache) == {'a': 'cached', 'b': 'ok', 'c': 'ok'}
+    assert cache.get('c', cache.key(graph.blocks['c'], [
+        cache.key(graph.blocks['b'], [cache.key(graph.blocks['a'], [])])
+    ])).stdout == '3\n'
+
+    cache.invalidate({'a'})
+    assert _statuses(graph, cache) == {'a': 'ok', 'b': 'cached', 'c': 'cached'}
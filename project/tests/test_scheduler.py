@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from canvas_runner.dag import Block, LayerGraph, parse_size
+from canvas_runner.execute import THREAD_ENV_VARS, cpu_budget
+from canvas_runner.runner import ResourcePool, run_layer
+
+
+def test_parse_size():
+    assert parse_size('500MB') == 500 * 2**20
+    assert parse_size('1.5gb') == 3 * 2**29
+    assert parse_size(1024) == 1024
+    with pytest.raises(ValueError):
+        parse_size('3 parsecs')
+
+
+def test_resource_pool_clamps_and_reserves():
+    pool = ResourcePool(cpus=4, memory=8 * 2**30)
+    big = pool.request(Block('1', 'big', 'big.py', compute_settings={'cpus': 16, 'memory': '32GB'}))
+    assert big == (4, 8 * 2**30)
+    small = pool.request(Block('2', 'small', 'small.py'))
+    assert small == (1, 0)
+
+    pool.acquire(pool.request(Block('3', 'half', 'half.py', compute_settings={'cpus': 2, 'memory': '4GB'})))
+    assert pool.fits(small, idle=False)
+    assert not pool.fits(big, idle=False)
+    assert pool.fits(big, idle=True)
+    with pytest.raises(ValueError):
+        Block('4', 'bad', 'bad.py', compute_settings={'cpus': 0}).cpus
+
+
+def test_cpu_budget_sets_and_restores_thread_limits(monkeypatch):
+    monkeypatch.delenv('OMP_NUM_THREADS', raising=False)
+    with cpu_budget(3):
+        assert all(os.environ[var] == '3' for var in THREAD_ENV_VARS)
+    assert 'OMP_NUM_THREADS' not in os.environ
+
+
+def _overlapping(tmp_path, cpus):
+    blocks = []
+    for name in ('a', 'b'):
+        path = tmp_path / f"{name}.py"
+        path.write_text("import time\ntime.sleep(0.3)\n")
+        blocks.append(Block(name, name, str(path), compute_settings={'cpus': 2}))
+    with open(os.devnull, 'w') as devnull:
+        results = run_layer(LayerGraph('test', blocks, []), workers=2, cpus=cpus, preload=False, stream=devnull)
+    a, b = (results[name].profile for name in ('a', 'b'))
+    return a['start'] < b['start'] + b['wall_time'] and b['start'] < a['start'] + a['wall_time']
+
+
+def test_blocks_wait_for_cpu_budget(tmp_path):
+    assert _overlapping(tmp_path, cpus=4)
+    assert not _overlapping(tmp_path, cpus=2)
+
+
+def test_only_budgeted_blocks_get_thread_caps(tmp_path, monkeypatch):
+    monkeypatch.delenv('LOKY_MAX_CPU_COUNT', raising=False)
+    blocks = []
+    for name, settings in (('budgeted', {'cpus': 2}), ('unbudgeted', None)):
+        path = tmp_path / f"{name}.py"
+        path.write_text("import os\nprint(os.environ.get('LOKY_MAX_CPU_COUNT'))\n")
+        blocks.append(Block(name, name, str(path), compute_settings=settings))
+    with open(os.devnull, 'w') as devnull:
+        results = run_layer(LayerGraph('test', blocks, []), workers=1, cpus=4, preload=False, stream=devnull)
+    assert results['budgeted'].stdout.strip() == '2'
+    assert results['unbudgeted'].stdout.strip() == 'None'
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_users
+from user_success.scoring import TIER_LABELS, CapSketches, SuccessScorer
+
+
+def _baseline(users):
+    """The original inline success_metric_definition computation"""
+    out = users.copy()
+    out['has_retention'] = (out['active_days'] >= 2).astype(int)
+    out['has_engagement_depth'] = (out['unique_event_types'] >= 3).astype(int)
+    out['has_activity_volume'] = (out['total_events'] >= 5).astype(int)
+    out['has_session_quality'] = (out['avg_session_duration_ms'] >= 120000).astype(int)
+    out['success_score'] = (out['has_retention'] + out['has_engagement_depth']
+                            + out['has_activity_volume'] + out['has_session_quality'])
+    out['is_successful'] = (out['success_score'] >= 3).astype(int)
+
+    def normalize_score(series, cap_percentile=95):
+        cap_value = series.quantile(cap_percentile / 100)
+        capped = series.clip(upper=cap_value)
+        return capped / cap_value if cap_value > 0 else capped
+
+    out['retention_score'] = normalize_score(out['active_days'])
+    out['engagement_score'] = normalize_score(out['unique_event_types'])
+    out['activity_score'] = normalize_score(out['total_events'])
+    out['session_score'] = normalize_score(out['avg_session_duration_ms'])
+    out['credit_score'] = normalize_score(out['total_credits_used'])
+    out['success_score_continuous'] = (
+        out['retention_score'] * 0.30 + out['engagement_score'] * 0.25 + out['activity_score'] * 0.20
+        + out['session_score'] * 0.15 + out['credit_score'] * 0.10
+    ) * 100
+    out['success_tier'] = pd.cut(out['success_score_continuous'], bins=[0, 20, 40, 60, 80, 100], labels=list(TIER_LABELS))
+    return out
+
+
+def test_score_matches_baseline():
+    users = make_users()
+    expected = _baseline(users)
+    scorer = SuccessScorer.fit(users)
+    scores = scorer.score(users, dtype=np.float64)
+
+    for column in ['has_retention', 'has_engagement_depth', 'has_activity_volume', 'has_session_quality',
+                   'success_score', 'is_successful']:
+        assert scores[column].dtype == np.int64
+        np.testing.assert_array_equal(scores[column], expected[column])
+    for column in ['retention_score', 'engagement_score', 'activity_score', 'session_score', 'credit_score',
+                   'success_score_continuous']:
+        np.testing.assert_allclose(scores[column], expected[column], rtol=1e-12)
+    tiers = pd.Categorical.from_codes(scores['success_tier_code'], categories=list(TIER_LABELS), ordered=True)
+    assert tiers.astype(object).tolist() == expected['success_tier'].astype(object).tolist()
+
+
+def test_saved_scorer_scores_new_batches_against_the_reference(tmp_path):
+    reference, batch = make_users(seed=1), make_users(n=50, seed=2)
+    scorer = SuccessScorer.fit(reference)
+    scorer.save(str(tmp_path / 'scorer.json'))
+    loaded = SuccessScorer.load(str(tmp_path / 'scorer.json'))
+    assert loaded.to_dict() == scorer.to_dict()
+    np.testing.assert_array_equal(loaded.score(batch)['success_score_continuous'],
+                                  scorer.score(batch)['success_score_continuous'])
+
+    user = batch.iloc[3].to_dict()
+    single = scorer.score_user(user)
+    assert single['success_score_continuous'] == pytest.approx(
+        scorer.score(batch, dtype=np.float64)['success_score_continuous'][3]
+    )
+
+
+def test_sketched_caps_match_exact_caps_on_small_tables():
+    users = make_users()
+    sketches = CapSketches()
+    for chunk in np.array_split(np.arange(len(users)), 4):
+        sketches.update(users.iloc[chunk])
+    assert sketches.caps() == pytest.approx(SuccessScorer.fit(users).caps, nan_ok=True)
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+scipy_stats = pytest.importorskip('scipy.stats')
+from user_success.comparison import adjust_pvalues, compare_groups, compare_segments  # noqa: E402
+
+# compare_segments column -> the matching compare_groups column
+MATCHING = {
+    'n_segment': 'n_a', 'n_rest': 'n_b', 'mean_segment': 'mean_a', 'mean_rest': 'mean_b',
+    'median_segment': 'median_a', 'median_rest': 'median_b', 'std_segment': 'std_a', 'std_rest': 'std_b',
+    'mean_diff': 'mean_diff', 'pct_diff': 'pct_diff', 'welch_t': 'welch_t', 'welch_pvalue': 'welch_pvalue',
+    'mannwhitney_u': 'mannwhitney_u', 'mannwhitney_pvalue': 'mannwhitney_pvalue', 'cohens_d': 'cohens_d',
+}
+
+
+def _features(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    segment = pd.Series(rng.choice(['a', 'b', 'c', 'd'], n), name='tier')
+    segment[rng.choice(n, 20)] = None
+    features = pd.DataFrame({
+        'continuous': rng.lognormal(size=n),
+        'ties': rng.integers(0, 4, n).astype(float),
+        'constant': np.full(n, 0.1),
+        # Constant within each segment but b, so also in the rest of b
+        'segment_constant': np.where(segment == 'b', rng.normal(size=n), 0.3),
+        # No values at all in segment d
+        'sparse': np.where((segment == 'd') | (rng.random(n) < 0.3), np.nan, rng.normal(size=n)),
+    })
+    return features, segment
+
+
+def _check_against_groups(result, features, segments, keys):
+    keyed = segments.notna().all(axis=1) if isinstance(segments, pd.DataFrame) else segments.notna()
+    for key in keys:
+        key = key if isinstance(key, tuple) else (key,)
+        in_segment = np.ones(len(features), dtype=bool)
+        rows = np.ones(len(result), dtype=bool)
+        for name, part in zip(result.columns, key):
+            in_segment &= (segments[name] if isinstance(segments, pd.DataFrame) else segments).eq(part).to_numpy()
+            rows &= (result[name] == part).to_numpy()
+        expected = compare_groups(features[keyed], in_segment[keyed.to_numpy()])
+        actual = result[rows].set_index('feature').loc[expected.index]
+        for column, expected_column in MATCHING.items():
+            np.testing.assert_allclose(
+                actual[column].to_numpy(np.float64), expected[expected_column].to_numpy(np.float64),
+                rtol=1e-9, atol=1e-12, err_msg=f"{key} {column}",
+            )
+
+
+def test_matches_compare_groups_per_segment():
+    features, segment = _features()
+    result = compare_segments(features, segment)
+    _check_against_groups(result, features, segment, ['a', 'b', 'c', 'd'])
+
+    rows = result.set_index(['tier', 'feature'])
+    assert rows.loc[('c', 'segment_constant'), 'std_segment'] == 0
+    assert rows.loc[('c', 'segment_constant'), 'mean_segment'] == 0.3
+    assert rows.loc[('b', 'segment_constant'), ['mean_rest', 'std_rest']].tolist() == [0.3, 0]
+    assert rows.loc[('a', 'constant'), 'cohens_d'] == 0
+    assert rows.loc[('d', 'sparse'), 'n_segment'] == 0
+    assert np.isnan(rows.loc[('d', 'sparse'), ['mean_segment', 'median_segment', 'std_segment']].to_numpy()).all()
+
+
+def test_multiindex_keys():
+    features, segment = _features(seed=1)
+    week = pd.Series(np.arange(len(features)) % 3, name='week')
+    segments = pd.concat([segment, week], axis=1)
+    result = compare_segments(features[['continuous', 'ties']], segments)
+    keys = list(result[['tier', 'week']].drop_duplicates().itertuples(index=False, name=None))
+    assert len(keys) == 12
+    _check_against_groups(result, features[['continuous', 'ties']], segments, keys)
+
+
+def test_adjust_pvalues():
+    rng = np.random.default_rng(2)
+    p_values = np.append(rng.random(50) ** 3, [np.nan, 0.5, 0.5])
+    tested = ~np.isnan(p_values)
+
+    adjusted = adjust_pvalues(p_values, 'fdr_bh')
+    np.testing.assert_allclose(adjusted[tested], scipy_stats.false_discovery_control(p_values[tested]))
+    assert np.isnan(adjusted[~tested]).all()
+
+    m = tested.sum()
+    np.testing.assert_allclose(adjust_pvalues(p_values, 'bonferroni')[tested], np.minimum(p_values[tested] * m, 1))
+
+    ranked = np.sort(p_values[tested])
+    holm = np.minimum(np.maximum.accumulate(ranked * (m - np.arange(m))), 1)
+    np.testing.assert_allclose(np.sort(adjust_pvalues(p_values, 'holm')[tested]), holm)
+
+    with pytest.raises(ValueError):
+        adjust_pvalues(p_values, 'sidak')
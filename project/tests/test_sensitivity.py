@@ -0,0 +1,44 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from conftest import make_users
+from user_success.scoring import TIER_LABELS, SuccessScorer
+from user_success.sensitivity import threshold_grid
+
+GRID = {
+    'active_days': [1, 2, 3, 5],
+    'unique_event_types': [3, 2, 4],
+    'total_events': [5, 10],
+    'avg_session_duration_ms': [60_000, 120_000],
+}
+
+
+def test_grid_matches_rule_applied_per_combination():
+    users = make_users()
+    scorer = SuccessScorer.fit(users)
+    result = threshold_grid(users, GRID, min_criteria=(0, 3, 4), scorer=scorer)
+    tiers = scorer.score(users, dtype=np.float64)['success_tier_code']
+    labels = [label.lower().replace(' ', '_') for label in TIER_LABELS + ('no tier',)]
+
+    columns = list(GRID)
+    expected = []
+    for k in (0, 3, 4):
+        for thresholds in itertools.product(*[sorted(GRID[column]) for column in columns]):
+            met = sum((users[column] >= threshold).astype(int) for column, threshold in zip(columns, thresholds))
+            successful = (met >= k).to_numpy()
+            n_successful = int(successful.sum())
+            row = dict(zip(columns, thresholds), min_criteria=k, n_successful=n_successful,
+                       n_unsuccessful=len(users) - n_successful)
+            for tier, label in enumerate(labels):
+                row['successful_' + label] = int((successful & (np.where(tiers < 0, len(TIER_LABELS), tiers) == tier)).sum())
+            expected.append(row)
+    expected = pd.DataFrame(expected)
+
+    assert len(result) == len(expected)
+    for column in expected.columns:
+        np.testing.assert_array_equal(result[column].to_numpy(dtype=np.float64), expected[column].to_numpy(dtype=np.float64))
+    np.testing.assert_allclose(result['success_rate'], expected['n_successful'] / len(users))
+    # Everyone meets at least zero criteria: the minority class is empty
+    assert np.isinf(result.loc[result['min_criteria'] == 0, 'imbalance_ratio']).all()
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from user_success.events import load_events
+from user_success.sessions import session_duration_by_user, sessionize
+
+
+def _loop_sessions(events, gap_minutes, use_session_id):
+    """Sessions by walking each user's events in time order"""
+    rows = []
+    timed = events[events['timestamp'].notna()]
+    for person, group in timed.groupby('person_id', observed=True):
+        group = group.sort_values('timestamp', kind='stable')
+        start = previous = previous_id = None
+        count = 0
+        for timestamp, session_id in zip(group['timestamp'], group['prop_$session_id']):
+            new = (
+                start is None
+                or timestamp - previous > pd.Timedelta(minutes=gap_minutes)
+                or (use_session_id and pd.notna(session_id) and pd.notna(previous_id) and session_id != previous_id)
+            )
+            if new:
+                if start is not None:
+                    rows.append((person, start, previous, count))
+                start, count = timestamp, 0
+            previous, previous_id = timestamp, session_id
+            count += 1
+        rows.append((person, start, previous, count))
+    return pd.DataFrame(rows, columns=['person_id', 'session_start', 'session_end', 'event_count'])
+
+
+@pytest.mark.parametrize('gap_minutes, use_session_id', [(30, True), (30, False), (0, True), (10**6, False)])
+def test_sessions_match_loop(events_csv, gap_minutes, use_session_id):
+    events = load_events(events_csv, use_cache=False)
+    result = sessionize(events, gap_minutes=gap_minutes, use_session_id=use_session_id)
+    expected = _loop_sessions(events, gap_minutes, use_session_id)
+
+    assert result['person_id'].astype(str).tolist() == expected['person_id'].astype(str).tolist()
+    assert (result['session_start'] == expected['session_start']).all()
+    assert (result['session_end'] == expected['session_end']).all()
+    np.testing.assert_array_equal(result['event_count'], expected['event_count'])
+    np.testing.assert_allclose(
+        result['duration_ms'], (expected['session_end'] - expected['session_start']).dt.total_seconds() * 1000
+    )
+
+    by_user = session_duration_by_user(result)
+    expected_by_user = result.groupby('person_id', observed=True)['duration_ms'].mean()
+    np.testing.assert_allclose(by_user.to_numpy(), expected_by_user.to_numpy())
+    assert by_user.index.tolist() == expected_by_user.index.astype(str).tolist()
@@ -0,0 +1,55 @@
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from canvas_runner.shared import SharedValue, release
+
+
+def _frame():
+    return pd.DataFrame({
+        'ints': np.arange(50_000),
+        'floats': np.linspace(0, 1, 50_000),
+        'labels': pd.Categorical(np.where(np.arange(50_000) % 3, 'a', 'b')),
+        'text': 'x',
+    })
+
+
+def _column_sum(shared):
+    return float(shared.load()['floats'].sum())
+
+
+def test_round_trip_shares_buffers_read_only():
+    frame = _frame()
+    shared = SharedValue.export({'frame': frame, 'small': [1, 2, 3]})
+    try:
+        assert shared.segments
+        loaded = shared.load()
+        pd.testing.assert_frame_equal(loaded['frame'], frame)
+        assert loaded['small'] == [1, 2, 3]
+        with pytest.raises(ValueError):
+            loaded['frame']['ints'].to_numpy()[0] = -1
+        del loaded
+    finally:
+        release([shared])
+
+
+def test_other_process_reads_the_segments():
+    shared = SharedValue.export(_frame())
+    try:
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(1) as pool:
+            assert pool.apply(_column_sum, (shared,)) == pytest.approx(_frame()['floats'].sum())
+    finally:
+        release([shared])
+
+
+def test_release_unlinks_segments():
+    shared = SharedValue.export(np.zeros(100_000))
+    names = [name for name, _ in shared.segments]
+    release([shared])
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(name=name)
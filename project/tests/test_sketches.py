@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from conftest import assert_features_equal, baseline_engineered_features
+from user_success.features import stream_engineered_features
+from user_success.sketches import QuantileSketch, UserHyperLogLog, hash32
+
+
+def _pairs(seed=0):
+    rng = np.random.default_rng(seed)
+    # Users 0-2 stay below the exact threshold, users 3-5 go far beyond it
+    sizes = [1, 5, 32, 200, 5_000, 20_000]
+    users = np.repeat(np.arange(len(sizes)), [2 * size for size in sizes])
+    values = np.concatenate([rng.integers(0, size, 2 * size) + 10**6 * user for user, size in enumerate(sizes)])
+    exact = pd.Series(values).groupby(users).nunique().to_numpy()
+    order = rng.permutation(len(users))
+    return users[order], hash32(values[order]), exact
+
+
+def test_exact_for_small_users_and_within_error_beyond():
+    users, hashes, exact = _pairs()
+    sketch = UserHyperLogLog(relative_error=0.02)
+    for part in np.array_split(np.arange(len(users)), 7):
+        sketch.add(users[part], hashes[part])
+    counts = sketch.counts(len(exact))
+    np.testing.assert_array_equal(counts[:3], exact[:3])
+    np.testing.assert_allclose(counts[3:], exact[3:], rtol=4 * 0.02)
+
+
+def test_merge_matches_single_sketch():
+    users, hashes, exact = _pairs(seed=1)
+    half = len(users) // 2
+    single = UserHyperLogLog(0.02)
+    single.add(users, hashes)
+    left, right = UserHyperLogLog(0.02), UserHyperLogLog(0.02)
+    left.add(users[:half], hashes[:half])
+    right.add(users[half:], hashes[half:])
+    left.merge(right, np.arange(len(exact)))
+    np.testing.assert_array_equal(left.counts(len(exact)), single.counts(len(exact)))
+
+
+def test_approximate_stream_is_exact_on_small_users(events_csv):
+    expected = baseline_engineered_features(pd.read_csv(events_csv))
+    assert_features_equal(stream_engineered_features(events_csv, chunksize=50, distinct_error=0.02), expected)
+
+
+def test_quantile_sketch_exact_until_compaction():
+    values = np.r_[np.arange(100.0), [np.nan] * 5, [7.0] * 20]
+    sketch = QuantileSketch(rank_error=0.001)
+    sketch.update(values)
+    for q in (0, 0.05, 0.5, 0.95, 1):
+        assert sketch.quantile(q) == pd.Series(values).quantile(q)
+    assert np.isnan(QuantileSketch().quantile(0.5))
+
+
+def test_quantile_sketch_rank_error_after_merges():
+    rng = np.random.default_rng(3)
+    values = rng.lognormal(size=200_000)
+    error = 0.005
+    parts = []
+    for seed, chunk in enumerate(np.array_split(values, 8)):
+        part = QuantileSketch(error, seed=seed)
+        for piece in np.array_split(chunk, 5):
+            part.update(piece)
+        parts.append(part)
+    sketch = parts[0]
+    for part in parts[1:]:
+        sketch.merge(part)
+
+    ordered = np.sort(values)
+    for q in (0.01, 0.25, 0.5, 0.95, 0.99):
+        rank = np.searchsorted(ordered, sketch.quantile(q)) / len(values)
+        assert abs(rank - q) <= 2 * error
@@ -0,0 +1,25 @@
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import assert_features_equal, baseline_engineered_features
+from user_success.events import cache_path_for, load_events
+
+pytest.importorskip('duckdb')
+from user_success.sql import sql_engineered_features  # noqa: E402
+
+
+def test_csv_source_matches_baseline(events_csv):
+    expected = baseline_engineered_features(pd.read_csv(events_csv))
+    assert not os.path.exists(cache_path_for(events_csv))
+    assert_features_equal(sql_engineered_features(events_csv, threads=2), expected)
+
+
+def test_parquet_cache_source_matches_baseline(events_csv):
+    pytest.importorskip('pyarrow')
+    load_events(events_csv)
+    assert os.path.exists(cache_path_for(events_csv))
+    # Missing timestamps are -1 in the cache's date column, not a day
+    expected = baseline_engineered_features(pd.read_csv(events_csv))
+    assert_features_equal(sql_engineered_features(events_csv, threads=2), expected)
@@ -0,0 +1,57 @@
+import pandas as pd
+
+from conftest import assert_features_equal, baseline_engineered_features
+from user_success.events import load_events, read_events_csv
+from user_success.features import stream_engineered_features
+from user_success.store import FeatureStore
+
+
+def test_incremental_refreshes_match_full_history(events_csv, tmp_path):
+    events = load_events(events_csv, use_cache=False)
+    cutoff = events['timestamp'].dropna().sort_values().iloc[len(events) // 2]
+    path = str(tmp_path / 'store.pkl')
+
+    # Day one sees the older half and the events without a timestamp,
+    # which the store never ingests
+    first = FeatureStore(path)
+    assert first.refresh(events[~(events['timestamp'] > cutoff)]) == (events['timestamp'] <= cutoff).sum()
+    assert first.watermark == cutoff
+
+    # Day two reopens the store and is handed the full log again
+    second = FeatureStore(path)
+    assert second.watermark == cutoff
+    assert second.refresh(events) == (events['timestamp'] > cutoff).sum()
+    assert second.refresh(events) == 0
+
+    raw = pd.read_csv(events_csv)
+    expected = baseline_engineered_features(raw[raw['timestamp'].notna()])
+    assert_features_equal(FeatureStore(path).features(), expected)
+
+
+def test_store_built_with_other_distinct_mode_is_rebuilt(events_csv, tmp_path):
+    events = load_events(events_csv, use_cache=False)
+    path = str(tmp_path / 'store.pkl')
+    FeatureStore(path).refresh(events)
+    approximate = FeatureStore(path, distinct_error=0.01)
+    assert approximate.watermark is None
+    assert approximate.refresh(events) == events['timestamp'].notna().sum()
+
+
+def test_untimestamped_events_are_never_ingested(events_csv, tmp_path):
+    events = load_events(events_csv, use_cache=False)
+    cutoff = events['timestamp'].dropna().sort_values().iloc[len(events) // 2]
+    path = str(tmp_path / 'store.pkl')
+    FeatureStore(path).refresh(events[~(events['timestamp'] > cutoff)])
+
+    # A later export adds untimestamped events for a known and a new user
+    late = read_events_csv(events_csv).iloc[:2].assign(timestamp=None)
+    late['person_id'] = [late['person_id'].iloc[0], 'late-user']
+    combined_csv = str(tmp_path / 'combined.csv')
+    combined = pd.concat([read_events_csv(events_csv), late], ignore_index=True)
+    combined.to_csv(combined_csv, index=False)
+    store = FeatureStore(path)
+    assert store.refresh(load_events(combined_csv, use_cache=False)) == (events['timestamp'] > cutoff).sum()
+
+    timestamped_csv = str(tmp_path / 'timestamped.csv')
+    combined[combined['timestamp'].notna()].to_csv(timestamped_csv, index=False)
+    assert_features_equal(store.features(), stream_engineered_features(timestamped_csv))
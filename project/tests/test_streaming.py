@@ -0,0 +1,20 @@
+import pandas as pd
+import pytest
+
+from conftest import assert_features_equal, baseline_engineered_features
+from user_success.events import parse_timestamps, read_events_csv
+from user_success.features import FeatureAccumulator, stream_engineered_features
+
+
+@pytest.mark.parametrize('chunksize', [1, 7, 10_000])
+def test_stream_matches_baseline(events_csv, chunksize):
+    expected = baseline_engineered_features(pd.read_csv(events_csv))
+    assert_features_equal(stream_engineered_features(events_csv, chunksize=chunksize), expected)
+
+
+def test_merged_partitions_match_single_accumulator(events_csv):
+    events = parse_timestamps(read_events_csv(events_csv))
+    half = len(events) // 2
+    merged = FeatureAccumulator().update(events.iloc[:half])
+    merged.merge(FeatureAccumulator().update(events.iloc[half:]))
+    assert_features_equal(merged.result(), FeatureAccumulator().update(events).result())
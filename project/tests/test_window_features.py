@@ -0,0 +1,20 @@
+import pandas as pd
+
+from conftest import assert_features_equal, baseline_engineered_features
+from user_success.events import load_events
+from user_success.features import compute_window_features
+
+
+def test_windows_match_baseline_on_filtered_events(events_csv):
+    raw = pd.read_csv(events_csv)
+    offset = (pd.to_datetime(raw['timestamp'], format='ISO8601')
+              - pd.to_datetime(raw['created_at'], format='ISO8601'))
+    windows = compute_window_features(load_events(events_csv, use_cache=False), (1, 2, 30))
+    persons = pd.Series(sorted(raw['person_id'].unique()), name='person_id')
+
+    for n_days, result in windows.items():
+        inside = (offset >= pd.Timedelta(0)) & (offset < pd.Timedelta(days=n_days))
+        expected = persons.to_frame().merge(
+            baseline_engineered_features(raw[inside]), on='person_id', how='left'
+        ).fillna(0)
+        assert_features_equal(result, expected)
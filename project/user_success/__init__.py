@@ -0,0 +1 @@
+"""Reusable engines behind the Development layer blocks."""
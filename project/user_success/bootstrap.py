@@ -0,0 +1,168 @@
+"""Bootstrap confidence intervals for two-group effect sizes."""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from user_success.comparison import compare_groups, first_reaching
+
+STATISTICS = ('mean_diff', 'median_diff', 'cohens_d', 'cohens_d_avg')
+
+# Default cap on the resample matrices of one chunk (see _chunk_size)
+RESAMPLE_BYTES = 256 << 20
+
+
+class _Group:
+    """One group's features (features x users), prepared once for resampling.
+
+    Valid values are shifted by the feature mean so that resampled sums of
+    squares stay free of cancellation; the sorted order of every feature
+    turns resample counts into medians.
+    """
+
+    def __init__(self, values):
+        valid = ~np.isnan(values)
+        self.n = values.shape[1]
+        with np.errstate(invalid='ignore'):
+            self.shift = np.nan_to_num(np.where(valid, values, 0).sum(axis=1) / valid.sum(axis=1))
+        shifted = np.where(valid, values - self.shift[:, None], 0)
+        # (users x features) so a (resamples x users) count matrix multiplies in
+        self.valid = np.ascontiguousarray(valid.T, dtype=np.float64)
+        self.shifted = np.ascontiguousarray(shifted.T)
+        self.squares = self.shifted ** 2
+        self.order = np.argsort(values, axis=1)
+        self.ordered = np.take_along_axis(values, self.order, axis=1)
+
+    def moments(self, counts):
+        """Valid count, mean, unbiased variance and median per (resample, feature)"""
+        weights = counts.astype(np.float64)
+        n = weights @ self.valid
+        sums = weights @ self.shifted
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = sums / n
+            variance = (weights @ self.squares - sums * mean) / (n - 1)
+        mean += self.shift
+        if self.n == 0:
+            # An empty group has no sorted values to take medians from
+            return n, mean, variance, np.full(mean.shape, np.nan)
+
+        # Draws of each user in every feature's sorted order; NaNs sort last,
+        # so the running count reaches the median ranks on valid values
+        running = np.take(counts, self.order, axis=1)
+        np.cumsum(running, axis=2, out=running)
+        n_resamples, n_features, _ = running.shape
+        running = running.reshape(n_resamples * n_features, self.n)
+        valid_n = n.reshape(-1).astype(np.int64)
+        feature = np.tile(np.arange(n_features), n_resamples)
+        lower = self.ordered[feature, first_reaching(running, (valid_n - 1) // 2 + 1)]
+        upper = self.ordered[feature, first_reaching(running, valid_n // 2 + 1)]
+        median = np.where(valid_n > 0, (lower + upper) / 2, np.nan).reshape(n_resamples, n_features)
+        return n, mean, variance, median
+
+
+def _resample_counts(generators, n):
+    """Draw counts per user for each resample from its index matrix row"""
+    indices = np.empty((len(generators), n), dtype=np.int64)
+    for row, generator in enumerate(generators):
+        indices[row] = generator.integers(0, n, n)
+    indices += (np.arange(len(generators)) * n)[:, None]
+    counts = np.bincount(indices.ravel(), minlength=len(generators) * n)
+    return counts.astype(np.int32).reshape(len(generators), n)
+
+
+def _effects(group_a, group_b, seeds):
+    """STATISTICS for the resamples seeded by `seeds`, each (resamples x features)"""
+    generators = [np.random.default_rng(seed) for seed in seeds]
+    n_a, mean_a, var_a, median_a = group_a.moments(_resample_counts(generators, group_a.n))
+    n_b, mean_b, var_b, median_b = group_b.moments(_resample_counts(generators, group_b.n))
+    diff = mean_a - mean_b
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pooled_sd = np.sqrt(((n_a - 1) * var_a + (n_b - 1) * var_b) / (n_a + n_b - 2))
+        avg_sd = np.sqrt((var_a + var_b) / 2)
+        return {
+            'mean_diff': diff,
+            'median_diff': median_a - median_b,
+            'cohens_d': np.where(pooled_sd == 0, 0.0, diff / pooled_sd),
+            'cohens_d_avg': np.where(avg_sd == 0, 0.0, diff / avg_sd),
+        }
+
+
+_worker_groups = None
+
+
+def _init_bootstrap_worker(group_a, group_b):
+    # With the fork start method the prepared groups are inherited, not pickled
+    global _worker_groups
+    _worker_groups = (group_a, group_b)
+
+
+def _worker_effects(seeds):
+    return _effects(*_worker_groups, seeds)
+
+
+def _chunk_size(n_users, n_features, max_bytes):
+    """Resamples per chunk so that its index, count and sorted running-count
+    matrices stay within about `max_bytes`"""
+    per_resample = max(1, n_users * (8 + 8 + 4 + 8 + 4 * n_features))
+    return max(1, max_bytes // per_resample)
+
+
+def bootstrap_effects(features, in_group, columns=None, n_resamples=2000, confidence=0.95,
+                      seed=0, workers=1, max_bytes=RESAMPLE_BYTES):
+    """Percentile bootstrap confidence intervals of group a (rows where
+    `in_group`) against group b for every feature.
+
+    Each resample redraws both groups with replacement at their own size.
+    The draws of a chunk of resamples form one index matrix per group,
+    reduced to per-user counts, so means and variances are matrix products
+    and medians come from running counts over each feature sorted once.
+    Chunks are capped at about `max_bytes` and spread over `workers`
+    processes. Every resample has its own seed spawned from `seed`, so the
+    intervals do not depend on the chunking or the number of workers.
+
+    Returns a DataFrame indexed by feature with, for each of STATISTICS
+    (defined as in compare_groups; median_diff is median_a - median_b), the
+    full-sample estimate and its `<statistic>_low` / `<statistic>_high`
+    bounds at `confidence`.
+    """
+    columns = list(features.columns if columns is None else columns)
+    in_group = np.asarray(in_group, dtype=bool)
+    values = np.stack([np.asarray(features[column], dtype=np.float64) for column in columns])
+    group_a, group_b = _Group(values[:, in_group]), _Group(values[:, ~in_group])
+    del values
+
+    seeds = np.random.SeedSequence(seed).spawn(n_resamples)
+    size = _chunk_size(group_a.n + group_b.n, len(columns), max_bytes)
+    if workers > 1:
+        size = min(size, -(-n_resamples // workers))
+    chunks = [seeds[start:start + size] for start in range(0, n_resamples, size)]
+    if workers <= 1 or len(chunks) == 1:
+        parts = [_effects(group_a, group_b, chunk) for chunk in chunks]
+    else:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_bootstrap_worker,
+            initargs=(group_a, group_b),
+        ) as pool:
+            parts = list(pool.map(_worker_effects, chunks))
+
+    estimates = compare_groups(features, in_group, columns)
+    estimates['median_diff'] = estimates['median_a'] - estimates['median_b']
+    tail = (1 - confidence) / 2
+    result = pd.DataFrame(index=estimates.index)
+    for statistic in STATISTICS:
+        draws = np.concatenate([part[statistic] for part in parts])
+        # Features without a single defined draw (an empty group, or no
+        # valid values in one) get NaN bounds
+        low, high = np.full((2, draws.shape[1]), np.nan)
+        defined = ~np.isnan(draws).all(axis=0)
+        if defined.any():
+            low[defined], high[defined] = np.nanquantile(draws[:, defined], [tail, 1 - tail], axis=0)
+        result[statistic] = estimates[statistic]
+        result[statistic + '_low'] = low
+        result[statistic + '_high'] = high
+    return result
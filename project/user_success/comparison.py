@@ -0,0 +1,417 @@
+"""Group comparison statistics for many features and segments at once."""
+import numpy as np
+import pandas as pd
+from scipy import special
+
+# Default cap on the working set of one batch of features
+BATCH_BYTES = 1 << 30
+
+# Peak bytes per cell (feature x user) of a batch: the float64 sorted values
+# and masks plus the 8-byte per-tie-block arrays of the Mann-Whitney pass,
+# which hold one block per cell when no values tie (about 65 bytes measured
+# with tracemalloc; heavily tied columns need about half)
+BYTES_PER_CELL = 72
+
+# Cells sorted together per batch (~15M, for ~1GB)
+BATCH_CELLS = BATCH_BYTES // BYTES_PER_CELL
+
+
+def _column_batch(features, columns):
+    """(columns x users) float64 matrix: each feature contiguous for sorting"""
+    return np.stack([np.asarray(features[column], dtype=np.float64) for column in columns])
+
+
+def _group_moments(values, in_group):
+    """Count, mean and unbiased variance per feature for groups a and b.
+
+    One matrix product with the two group indicators gives the sums; the
+    squares are summed around the feature's overall mean to avoid
+    cancellation; round-off can still leave a tiny negative variance, so
+    it is clamped at 0 (see also _exact_constants).
+    """
+    valid = ~np.isnan(values)
+    groups = np.column_stack([in_group, ~in_group]).astype(np.float64)
+    counts = valid @ groups
+    filled = np.where(valid, values, 0)
+    sums = filled @ groups
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shift = np.nan_to_num(sums.sum(axis=1) / counts.sum(axis=1))[:, None]
+        shifted = np.where(valid, filled - shift, 0)
+        shifted_sums = sums - counts * shift
+        variance = ((shifted * shifted) @ groups - shifted_sums ** 2 / counts) / (counts - 1)
+        mean = sums / counts
+    variance = np.maximum(variance, 0)
+    counts = counts.astype(np.int64)
+    return counts[:, 0], mean[:, 0], variance[:, 0], counts[:, 1], mean[:, 1], variance[:, 1]
+
+
+def _rank_blocks(ordered):
+    """Tie blocks of the sorted rows: flat index of each block's first value
+    and the block's length (blocks never span rows).
+
+    NaNs sort last and are never equal, so each is its own block and the
+    ranks of the valid values are the ranks among valid values only.
+    """
+    n_rows, n = ordered.shape
+    starts = np.ones(ordered.shape, dtype=bool)
+    starts[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    flat_starts = np.flatnonzero(starts)
+    return flat_starts, np.diff(np.append(flat_starts, n_rows * n))
+
+
+def first_reaching(count, k):
+    """Position in each row where the nondecreasing `count` first reaches `k`"""
+    n = count.shape[1]
+    positions = np.fromiter(
+        (np.searchsorted(row, target) for row, target in zip(count, k)), dtype=np.int64, count=len(count)
+    )
+    return np.minimum(positions, n - 1)
+
+
+def _exact_constants(mean, variance, n, low, high):
+    """Mean and variance with groups whose values are all equal (smallest
+    `low` == largest `high`) set to exactly that value and 0.
+
+    Summing a constant can round its mean and leave a variance of ~1e-17
+    instead of 0, which would turn t and Cohen's d into huge numbers.
+    """
+    constant = (n > 0) & (low == high)
+    return np.where(constant, low, mean), np.where(constant & (n > 1), 0.0, variance)
+
+
+def _sorted_range(ordered, count, n):
+    """Smallest and largest value of a group per row (see _sorted_median)"""
+    if ordered.shape[1] == 0:
+        return np.full(len(ordered), np.nan), np.full(len(ordered), np.nan)
+    rows = np.arange(len(ordered))
+    return ordered[rows, first_reaching(count, np.ones_like(n))], ordered[rows, first_reaching(count, n)]
+
+
+def _sorted_median(ordered, count, n):
+    """Median of a group per row, given the sorted values and the running
+    count of the group's valid members along each sorted row"""
+    if ordered.shape[1] == 0:
+        return np.full(len(ordered), np.nan)
+    rows = np.arange(len(ordered))
+    lower = ordered[rows, first_reaching(count, (n - 1) // 2 + 1)]
+    upper = ordered[rows, first_reaching(count, n // 2 + 1)]
+    return np.where(n > 0, (lower + upper) / 2, np.nan)
+
+
+def _mann_whitney(ordered, in_group, n_a, n_b):
+    """Two-sided Mann-Whitney U of group a from the sorted rows and the
+    group mask in sorted order, with the normal approximation, tie
+    correction and continuity correction of scipy's asymptotic method"""
+    n_rows, n_cols = ordered.shape
+    flat_starts, lengths = _rank_blocks(ordered)
+    block_rows, first = np.divmod(flat_starts, n_cols)
+    # Group a members per tie block, each at the block's average rank
+    members = np.add.reduceat(in_group.ravel().astype(np.int64), flat_starts)
+    average_rank = first + (lengths + 1) / 2
+    rank_sum = np.bincount(block_rows, weights=members * average_rank, minlength=n_rows)
+    lengths = lengths.astype(np.float64)
+    ties = np.bincount(block_rows, weights=lengths ** 3 - lengths, minlength=n_rows)
+
+    u_a = rank_sum - n_a * (n_a + 1) / 2
+    return u_a, _mann_whitney_pvalue(u_a, n_a, n_b, ties)
+
+
+def _mann_whitney_pvalue(u_a, n_a, n_b, ties):
+    """Two-sided asymptotic p-value of U; `ties` is the sum of t**3 - t over
+    the tie blocks of both groups together"""
+    u_max = np.maximum(u_a, n_a * n_b - u_a)
+    n = n_a + n_b
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma = np.sqrt(n_a * n_b / 12 * ((n + 1) - ties / (n * (n - 1))))
+        z = (u_max - n_a * n_b / 2 - 0.5) / sigma
+    return np.clip(2 * special.ndtr(-z), 0, 1)
+
+
+def _t_pvalue(t, df):
+    return 2 * special.stdtr(df, -np.abs(t))
+
+
+def compare_groups(features, in_group, columns=None, batch_cells=BATCH_CELLS):
+    """Group a (rows where `in_group`) against group b (the other rows) for
+    every column of `features` at once.
+
+    Missing values are dropped per feature. Each feature is sorted once;
+    the sorted order gives both groups' medians and the average ranks for
+    the Mann-Whitney test. Features are converted and sorted in batches of
+    about `batch_cells` values, so the feature matrix is never held whole.
+
+    Returns a DataFrame indexed by feature with the group sizes, means,
+    medians and standard deviations, mean_diff, pct_diff (relative to group
+    b's mean, 0 when that mean is not positive), Student's t and p-value
+    (t_stat, t_pvalue), Welch's t, degrees of freedom and p-value, the
+    Mann-Whitney U of group a with its two-sided p-value, and Cohen's d with
+    the pooled (n-1 weighted) standard deviation (cohens_d) and with the
+    unweighted average of the two variances (cohens_d_avg). Effect sizes
+    are 0 when the standard deviation is 0 and NaN when it is undefined
+    (e.g. an empty group).
+    """
+    columns = list(features.columns if columns is None else columns)
+    in_group = np.asarray(in_group, dtype=bool)
+    if len(in_group) != len(features):
+        raise ValueError(f"in_group has {len(in_group)} rows, features have {len(features)}")
+
+    batch_size = max(1, batch_cells // max(len(in_group), 1))
+    parts = []
+    for start in range(0, len(columns), batch_size):
+        batch = _column_batch(features, columns[start:start + batch_size])
+        n_a, mean_a, var_a, n_b, mean_b, var_b = _group_moments(batch, in_group)
+
+        order = np.argsort(batch, axis=1)
+        ordered = np.take_along_axis(batch, order, axis=1)
+        del batch
+        # NaNs sort last, so before them the running count of group b is
+        # the position minus the running count of group a
+        sorted_group = in_group[order] & ~np.isnan(ordered)
+        del order
+        count_a = np.cumsum(sorted_group, axis=1, dtype=np.int32)
+        median_a = _sorted_median(ordered, count_a, n_a)
+        mean_a, var_a = _exact_constants(mean_a, var_a, n_a, *_sorted_range(ordered, count_a, n_a))
+        count_a -= np.arange(1, ordered.shape[1] + 1, dtype=np.int32)
+        np.negative(count_a, out=count_a)
+        median_b = _sorted_median(ordered, count_a, n_b)
+        mean_b, var_b = _exact_constants(mean_b, var_b, n_b, *_sorted_range(ordered, count_a, n_b))
+        del count_a
+        u_a, u_pvalue = _mann_whitney(ordered, sorted_group, n_a, n_b)
+
+        diff = mean_a - mean_b
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dof = n_a + n_b - 2
+            pooled_var = ((n_a - 1) * var_a + (n_b - 1) * var_b) / dof
+            t_stat = diff / np.sqrt(pooled_var * (1 / n_a + 1 / n_b))
+            se_a, se_b = var_a / n_a, var_b / n_b
+            welch_t = diff / np.sqrt(se_a + se_b)
+            welch_df = (se_a + se_b) ** 2 / (se_a ** 2 / (n_a - 1) + se_b ** 2 / (n_b - 1))
+            pooled_sd = np.sqrt(pooled_var)
+            avg_sd = np.sqrt((var_a + var_b) / 2)
+            cohens_d = np.where(pooled_sd == 0, 0.0, diff / pooled_sd)
+            cohens_d_avg = np.where(avg_sd == 0, 0.0, diff / avg_sd)
+            pct_diff = np.where(mean_b > 0, diff / mean_b * 100, 0.0)
+
+        parts.append(pd.DataFrame({
+            'n_a': n_a,
+            'n_b': n_b,
+            'mean_a': mean_a,
+            'mean_b': mean_b,
+            'median_a': median_a,
+            'median_b': median_b,
+            'std_a': np.sqrt(var_a),
+            'std_b': np.sqrt(var_b),
+            'mean_diff': diff,
+            'pct_diff': pct_diff,
+            't_stat': t_stat,
+            't_pvalue': _t_pvalue(t_stat, dof),
+            'welch_t': welch_t,
+            'welch_df': welch_df,
+            'welch_pvalue': _t_pvalue(welch_t, welch_df),
+            'mannwhitney_u': u_a,
+            'mannwhitney_pvalue': u_pvalue,
+            'cohens_d': cohens_d,
+            'cohens_d_avg': cohens_d_avg,
+        }, index=pd.Index(columns[start:start + batch_size], name='feature')))
+    return pd.concat(parts)
+
+
+def adjust_pvalues(p_values, method='fdr_bh'):
+    """Multiple-testing adjusted p-values; NaNs are left out of the family.
+
+    `method` is 'fdr_bh' (Benjamini-Hochberg false discovery rate), 'holm'
+    or 'bonferroni' (family-wise error rate).
+    """
+    p_values = np.asarray(p_values, dtype=np.float64)
+    adjusted = np.full(p_values.shape, np.nan)
+    tested = np.flatnonzero(~np.isnan(p_values))
+    m = len(tested)
+    if m == 0:
+        return adjusted
+    if method == 'bonferroni':
+        adjusted[tested] = np.minimum(p_values[tested] * m, 1)
+        return adjusted
+    order = tested[np.argsort(p_values[tested], kind='stable')]
+    ranked = p_values[order]
+    if method == 'fdr_bh':
+        scaled = ranked * m / np.arange(1, m + 1)
+        adjusted[order] = np.minimum(np.minimum.accumulate(scaled[::-1])[::-1], 1)
+    elif method == 'holm':
+        scaled = ranked * (m - np.arange(m))
+        adjusted[order] = np.minimum(np.maximum.accumulate(scaled), 1)
+    else:
+        raise ValueError(f"Unknown correction method: {method!r}")
+    return adjusted
+
+
+def _segment_codes(segments):
+    """Dense segment codes (-1 for a missing key) and the sorted segment keys"""
+    if isinstance(segments, pd.DataFrame):
+        # A row with any missing key part belongs to no segment
+        complete = segments.notna().all(axis=1).to_numpy()
+        codes = np.full(len(segments), -1, dtype=np.int64)
+        codes[complete], uniques = pd.factorize(pd.MultiIndex.from_frame(segments[complete]), sort=True)
+        return codes, pd.MultiIndex.from_tuples(uniques, names=list(segments.columns))
+    segments = segments if isinstance(segments, pd.Series) else pd.Series(segments)
+    codes, uniques = pd.factorize(segments, sort=True)
+    return codes, pd.Index(uniques, name=segments.name)
+
+
+def _segment_lookups(ordered, positions, starts, n_segment):
+    """Value at a given rank (one rank per segment) within each segment and
+    within its rest, from one column's sorted values.
+
+    `positions` holds the sorted positions of every segment's members,
+    segment by segment and increasing within a segment.
+    """
+    n = len(ordered)
+    n_segments = len(n_segment)
+
+    def segment_value(rank):
+        return ordered[positions[np.clip(starts + rank, 0, n - 1)]]
+
+    # The rest value of rank r sits at sorted position r + j, where j is the
+    # number of members ahead of it: the members whose position minus their
+    # index within the segment is at most r. Offsetting each segment past
+    # the previous one turns all the lookups into one searchsorted.
+    segment = np.repeat(np.arange(n_segments), n_segment)
+    offsets = np.arange(n_segments) * (n + 1)
+    shifted = positions - (np.arange(len(positions)) - starts[segment]) + offsets[segment]
+
+    def rest_value(rank):
+        ahead = np.searchsorted(shifted, rank + offsets, side='right') - starts
+        return ordered[np.clip(rank + ahead, 0, n - 1)]
+
+    return segment_value, rest_value
+
+
+def _segment_medians(ordered, positions, starts, n_segment):
+    """Median of each segment and of its rest (see _segment_lookups)"""
+    n = len(ordered)
+    if n == 0:
+        return np.full(len(n_segment), np.nan), np.full(len(n_segment), np.nan)
+    segment_value, rest_value = _segment_lookups(ordered, positions, starts, n_segment)
+    n_rest = n - n_segment
+    segment_median = (segment_value((n_segment - 1) // 2) + segment_value(n_segment // 2)) / 2
+    rest_median = (rest_value((n_rest - 1) // 2) + rest_value(n_rest // 2)) / 2
+    return np.where(n_segment > 0, segment_median, np.nan), np.where(n_rest > 0, rest_median, np.nan)
+
+
+def _segment_ranges(ordered, positions, starts, n_segment):
+    """Smallest and largest value of each segment and of its rest (see
+    _segment_lookups; meaningless where the segment or rest is empty)"""
+    n = len(ordered)
+    if n == 0:
+        return tuple(np.full(len(n_segment), np.nan) for _ in range(4))
+    segment_value, rest_value = _segment_lookups(ordered, positions, starts, n_segment)
+    n_rest = n - n_segment
+    return segment_value(0), segment_value(n_segment - 1), rest_value(0), rest_value(n_rest - 1)
+
+
+def compare_segments(features, segments, columns=None, correction='fdr_bh', alpha=0.05):
+    """Every segment against the rest of the users, for every feature.
+
+    `segments` labels each row of `features`: a Series, or a DataFrame whose
+    columns together form the segment key (e.g. signup week and tier).
+    Rows with a missing key take part in no comparison, and missing feature
+    values are dropped per feature. Per feature the column is sorted once;
+    grouped sums give every segment's mean and variance (the rest by
+    subtraction from the totals), the sorted order gives segment and rest
+    medians, and grouped sums of the tie-averaged ranks give every
+    segment's Mann-Whitney U. The work grows with the number of users, not
+    users times segments.
+
+    Returns a tidy DataFrame with one row per (segment, feature): the
+    segment key column(s), feature, n_segment, n_rest, means, medians and
+    standard deviations of segment and rest, mean_diff, pct_diff (relative
+    to the rest mean, 0 when that mean is not positive), Welch's t and
+    p-value, Mann-Whitney U and p-value, pooled Cohen's d (0 when the
+    standard deviation is 0, NaN when it is undefined), and the
+    Mann-Whitney p-value adjusted across all rows by `correction` (see
+    adjust_pvalues) with `significant` at `alpha`.
+    """
+    columns = list(features.columns if columns is None else columns)
+    codes, keys = _segment_codes(segments)
+    n_segments = len(keys)
+
+    parts = []
+    for column in columns:
+        values = np.asarray(features[column], dtype=np.float64)
+        rows = np.flatnonzero((codes >= 0) & ~np.isnan(values))
+        values, row_codes = values[rows], codes[rows]
+        n = len(values)
+
+        n_segment = np.bincount(row_codes, minlength=n_segments)
+        shift = values.mean() if n else 0.0
+        shifted = values - shift
+        sums = np.bincount(row_codes, weights=shifted, minlength=n_segments)
+        squares = np.bincount(row_codes, weights=shifted * shifted, minlength=n_segments)
+        n_rest = n - n_segment
+        rest_sums = shifted.sum() - sums
+        rest_squares = (shifted * shifted).sum() - squares
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_segment = sums / n_segment
+            mean_rest = rest_sums / n_rest
+            var_segment = (squares - sums * mean_segment) / (n_segment - 1)
+            var_rest = (rest_squares - rest_sums * mean_rest) / (n_rest - 1)
+        var_segment, var_rest = np.maximum(var_segment, 0), np.maximum(var_rest, 0)
+        mean_segment += shift
+        mean_rest += shift
+
+        order = np.argsort(values, kind='stable')
+        ordered = values[order]
+        flat_starts, lengths = _rank_blocks(ordered[None, :])
+        ranks = np.repeat(flat_starts + (lengths + 1) / 2, lengths)
+        lengths = lengths.astype(np.float64)
+        ties = (lengths ** 3 - lengths).sum()
+        rank_sums = np.bincount(row_codes[order], weights=ranks, minlength=n_segments)
+        u_segment = rank_sums - n_segment * (n_segment + 1) / 2
+        u_pvalue = _mann_whitney_pvalue(u_segment, n_segment, n_rest, ties)
+
+        # Sorted positions of each segment's members, grouped by segment
+        positions = np.argsort(row_codes[order], kind='stable')
+        starts = np.concatenate([[0], np.cumsum(n_segment)[:-1]]).astype(np.int64)
+        median_segment, median_rest = _segment_medians(ordered, positions, starts, n_segment)
+        low_segment, high_segment, low_rest, high_rest = _segment_ranges(ordered, positions, starts, n_segment)
+        mean_segment, var_segment = _exact_constants(mean_segment, var_segment, n_segment, low_segment, high_segment)
+        mean_rest, var_rest = _exact_constants(mean_rest, var_rest, n_rest, low_rest, high_rest)
+
+        diff = mean_segment - mean_rest
+        with np.errstate(divide='ignore', invalid='ignore'):
+            se_segment, se_rest = var_segment / n_segment, var_rest / n_rest
+            welch_t = diff / np.sqrt(se_segment + se_rest)
+            welch_df = (se_segment + se_rest) ** 2 / (
+                se_segment ** 2 / (n_segment - 1) + se_rest ** 2 / (n_rest - 1)
+            )
+            pooled_sd = np.sqrt(((n_segment - 1) * var_segment + (n_rest - 1) * var_rest) / (n - 2))
+            cohens_d = np.where(pooled_sd == 0, 0.0, diff / pooled_sd)
+            pct_diff = np.where(mean_rest > 0, diff / mean_rest * 100, 0.0)
+
+        parts.append(pd.DataFrame({
+            'segment_code': np.arange(n_segments),
+            'feature': column,
+            'n_segment': n_segment,
+            'n_rest': n_rest,
+            'mean_segment': mean_segment,
+            'mean_rest': mean_rest,
+            'median_segment': median_segment,
+            'median_rest': median_rest,
+            'std_segment': np.sqrt(var_segment),
+            'std_rest': np.sqrt(var_rest),
+            'mean_diff': diff,
+            'pct_diff': pct_diff,
+            'welch_t': welch_t,
+            'welch_pvalue': _t_pvalue(welch_t, welch_df),
+            'mannwhitney_u': u_segment,
+            'mannwhitney_pvalue': u_pvalue,
+            'cohens_d': cohens_d,
+        }))
+
+    result = pd.concat(parts, ignore_index=True).sort_values('segment_code', kind='stable', ignore_index=True)
+    key_frame = keys.to_frame(index=False) if isinstance(keys, pd.MultiIndex) else pd.DataFrame(
+        {keys.name if keys.name is not None else 'segment': keys}
+    )
+    result = pd.concat([key_frame.iloc[result.pop('segment_code')].reset_index(drop=True), result], axis=1)
+    result['p_adjusted'] = adjust_pvalues(result['mannwhitney_pvalue'], correction)
+    result['significant'] = result['p_adjusted'] < alpha
+    return result
@@ -0,0 +1,240 @@
+"""Event log loading with a columnar on-disk cache."""
+import os
+import re
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Only the columns the engineered features read
+EVENT_COLUMNS = [
+    'person_id',
+    'event',
+    'timestamp',
+    'created_at',
+    'prop_$session_id',
+    'prop_$sdk_debug_current_session_duration',
+    'prop_credits_used',
+]
+
+EVENT_DTYPES = {
+    'person_id': str,
+    'event': str,
+    'timestamp': str,
+    'created_at': str,
+    'prop_$session_id': str,
+    'prop_$sdk_debug_current_session_duration': 'float64',
+    'prop_credits_used': 'float64',
+}
+
+TIMESTAMP_COLUMNS = ['timestamp', 'created_at']
+
+# Repeated strings kept as dictionary-encoded categoricals: int codes per row
+# plus one sorted dictionary of distinct values
+CATEGORICAL_COLUMNS = ['person_id', 'event', 'prop_$session_id']
+
+# Bump whenever the cached representation changes so stale caches are rebuilt
+CACHE_VERSION = 3
+
+
+def read_events_csv(path, **kwargs):
+    """Read the event CSV restricted to EVENT_COLUMNS with fixed dtypes"""
+    return pd.read_csv(path, usecols=EVENT_COLUMNS, dtype=EVENT_DTYPES, **kwargs)
+
+
+NS_PER_DAY = 86_400 * 10**9
+
+# 'YYYY-MM-DDTHH:MM:SS[.fraction][Z|+00:00]', the layout our exports use
+_FIXED_LAYOUT = re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d{1,9})?(Z|\+00:00)?')
+_DAYS_IN_MONTH = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+def _days_from_civil(year, month, day):
+    """Days since 1970-01-01 for proleptic Gregorian dates (vectorized)"""
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def _parse_fixed_layout(values):
+    """Parse strings that all share one fixed ISO8601 layout by field slicing.
+
+    Returns None when the values do not all share the layout of the first
+    one (or hold impossible dates), so the caller can fall back to pandas.
+    """
+    if len(values) == 0:
+        return None
+    first = values[0]
+    match = _FIXED_LAYOUT.fullmatch(first) if isinstance(first, str) else None
+    if match is None:
+        return None
+    width = len(first)
+    # Before the byte cast, which would cut longer strings to the width
+    if not (pd.Series(values, dtype=object).str.len() == width).all():
+        return None
+    try:
+        raw = np.array(values, dtype=f'S{width}')
+    except (UnicodeEncodeError, TypeError, ValueError):
+        return None
+    chars = raw.view(np.uint8).reshape(len(values), width)
+
+    template = first.encode()
+    # The UTC offset's digits must match exactly, not just be digits
+    offset_start = match.start(2) if match.group(2) else width
+    digits = chars - np.uint8(48)
+    for pos, char in enumerate(template):
+        if 48 <= char <= 57 and pos < offset_start:
+            # uint8 wraps below '0', so one comparison rejects every non-digit
+            if np.any(digits[:, pos] > 9):
+                return None
+        elif np.any(chars[:, pos] != char):
+            return None
+
+    def field(start, stop):
+        out = np.zeros(len(values), dtype=np.int64)
+        for pos in range(start, stop):
+            out = out * 10 + digits[:, pos]
+        return out
+
+    year, month, day = field(0, 4), field(5, 7), field(8, 10)
+    hour, minute, second = field(11, 13), field(14, 16), field(17, 19)
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    if (np.any((month < 1) | (month > 12)) or np.any(day < 1)
+            or np.any(day > _DAYS_IN_MONTH[np.clip(month, 0, 12)] + (leap & (month == 2)))
+            or np.any(hour > 23) or np.any(minute > 59) or np.any(second > 59)):
+        return None
+
+    ns = (_days_from_civil(year, month, day) * 86_400 + hour * 3_600 + minute * 60 + second) * 10**9
+    if match.group(1):
+        n_frac = len(match.group(1)) - 1
+        ns += field(20, 20 + n_frac) * 10 ** (9 - n_frac)
+    tz = 'UTC' if match.group(2) else None
+    return pd.DatetimeIndex(ns.view('datetime64[ns]')).tz_localize(tz)
+
+
+def parse_iso_timestamps(series, dedupe_ratio=0.5):
+    """Parse an ISO8601 string column, each distinct string only once.
+
+    Strings are deduplicated first when a sample suggests they repeat (e.g.
+    created_at, one value per user); the distinct values are parsed with
+    vectorized field slicing when they share a fixed layout, else with
+    pd.to_datetime(format='ISO8601').
+    """
+    series = pd.Series(series)
+    notna = series.notna().to_numpy()
+    values = series[notna]
+    sample = values.iloc[:10_000]
+    if len(sample) and sample.nunique() <= dedupe_ratio * len(sample):
+        codes, uniques = pd.factorize(values)
+        uniques = np.asarray(uniques, dtype=object)
+    else:
+        codes, uniques = None, values.to_numpy(dtype=object)
+
+    parsed = _parse_fixed_layout(uniques)
+    if parsed is None:
+        parsed = pd.DatetimeIndex(pd.to_datetime(uniques, format='ISO8601'))
+    if codes is not None:
+        parsed = parsed.take(codes)
+    if notna.all():
+        return pd.Series(parsed, index=series.index, name=series.name)
+    out = pd.Series(pd.NaT, index=series.index, name=series.name, dtype=parsed.dtype)
+    out[notna] = parsed
+    return out
+
+
+def day_numbers(timestamps):
+    """Days since the epoch of each timestamp's local date (-1 for NaT)"""
+    ts = pd.Series(timestamps)
+    if getattr(ts.dt, 'tz', None) is not None:
+        # dt.date uses the wall-clock date, so drop the zone without shifting
+        ts = ts.dt.tz_localize(None)
+    ns = ts.to_numpy(dtype='datetime64[ns]').view('int64')
+    days = np.floor_divide(ns, NS_PER_DAY)
+    days[ts.isna().to_numpy()] = -1
+    return days
+
+
+def parse_timestamps(df):
+    """Convert the ISO8601 timestamp columns to datetimes in place.
+
+    Also adds `date`, each event's calendar date as an int32 day number
+    since 1970-01-01 (-1 where the timestamp is missing).
+    """
+    for col in TIMESTAMP_COLUMNS:
+        df[col] = parse_iso_timestamps(df[col])
+    df['date'] = day_numbers(df['timestamp']).astype(np.int32)
+    return df
+
+
+def encode_categoricals(df):
+    """Dictionary-encode CATEGORICAL_COLUMNS in place"""
+    for col in CATEGORICAL_COLUMNS:
+        df[col] = df[col].astype('category')
+    return df
+
+
+def cache_path_for(path, cache_dir=None):
+    """Cache file for `path`, keyed by the source file's size and mtime"""
+    st = os.stat(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), '.event_cache')
+    name = f"{stem}-v{CACHE_VERSION}-{st.st_size}-{st.st_mtime_ns}.parquet"
+    return os.path.join(cache_dir, name)
+
+
+def _parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+# <stem>-v<version>-<size>-<mtime_ns>.parquet, as written by cache_path_for
+CACHE_NAME_PATTERN = re.compile(r'^(?P<stem>.+)-v\d+-\d+-\d+\.parquet$')
+
+
+def _remove_stale_caches(cache_file):
+    """Drop caches of the same source built from an older size/mtime/version.
+
+    Only names of exactly the cache_path_for form with the same stem are
+    removed, so `events-vip.csv`'s cache survives a refresh of `events.csv`.
+    """
+    cache_dir = os.path.dirname(cache_file)
+    stem = CACHE_NAME_PATTERN.match(os.path.basename(cache_file)).group('stem')
+    for name in os.listdir(cache_dir):
+        match = CACHE_NAME_PATTERN.match(name)
+        full = os.path.join(cache_dir, name)
+        if full != cache_file and match and match.group('stem') == stem:
+            os.remove(full)
+
+
+def load_events(path, cache_dir=None, use_cache=True):
+    """Load the event log, converting the CSV to a Parquet cache on first use.
+
+    Later calls with an unchanged source file read the cache instead of
+    re-parsing the CSV and its ISO8601 timestamps. Without pyarrow the CSV
+    is parsed directly every time. `person_id`, `event` and the session id
+    come back as categoricals whose sorted categories are the dictionaries.
+    """
+    if not use_cache or not _parquet_available():
+        return encode_categoricals(parse_timestamps(read_events_csv(path)))
+
+    cache_file = cache_path_for(path, cache_dir)
+    if os.path.exists(cache_file):
+        return pd.read_parquet(cache_file)
+
+    df = encode_categoricals(parse_timestamps(read_events_csv(path)))
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = cache_file + '.tmp'
+        df.to_parquet(tmp_file, index=False)
+        os.replace(tmp_file, cache_file)
+        _remove_stale_caches(cache_file)
+    except OSError as exc:
+        warnings.warn(f"Could not write event cache {cache_file}: {exc}")
+    return df
@@ -0,0 +1,488 @@
+"""Per-user feature aggregation for the feature engineering block."""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from user_success.events import day_numbers, parse_timestamps, read_events_csv
+from user_success.sketches import DistinctKeys, UserHyperLogLog, hash32, pack_pairs, pair_users, pair_values
+
+FEATURE_COLUMNS = [
+    'total_events',
+    'unique_event_types',
+    'avg_session_duration_ms',
+    'total_credits_used',
+    'credit_transaction_count',
+    'active_days',
+    'events_per_day',
+]
+
+SESSION_COLUMN = 'prop_$session_id'
+DURATION_COLUMN = 'prop_$sdk_debug_current_session_duration'
+CREDITS_COLUMN = 'prop_credits_used'
+
+
+def event_days(df):
+    """Day number of each event, from the `date` column when the loader made it"""
+    if 'date' in df and pd.api.types.is_integer_dtype(df['date']):
+        return df['date'].to_numpy()
+    return day_numbers(df['timestamp'])
+
+
+def dictionary_codes(series):
+    """Integer codes (-1 for missing) and the code-to-value dictionary.
+
+    Categorical columns already carry both, so their strings are not hashed
+    again; anything else is factorized with sorted uniques.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    return pd.factorize(series, sort=True)
+
+
+def count_distinct_pairs(user_codes, value_codes, n_users):
+    """Number of distinct non-negative value codes per user"""
+    mask = value_codes >= 0
+    users = user_codes[mask].astype(np.int64)
+    values = value_codes[mask].astype(np.int64)
+    if len(values) == 0:
+        return np.zeros(n_users, dtype=np.int64)
+    base = values.min()
+    width = values.max() - base + 1
+    pairs = np.unique(users * width + (values - base))
+    return np.bincount(pairs // width, minlength=n_users)
+
+
+def max_by_key(keys, values):
+    """Sorted unique keys and the max of `values` for each key"""
+    if len(keys) == 0:
+        return keys, values
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return keys[starts], np.maximum.reduceat(values[order], starts)
+
+
+def session_max_durations(user_codes, session_codes, durations):
+    """Max duration of every (user, session) pair with a known duration.
+
+    Returns the owning user code and the max duration of each pair; sessions
+    whose durations are all missing are dropped, as in a groupby max + mean.
+    """
+    mask = (session_codes >= 0) & ~np.isnan(durations)
+    users = user_codes[mask].astype(np.int64)
+    sessions = session_codes[mask].astype(np.int64)
+    if len(sessions) == 0:
+        return users, durations[mask]
+
+    width = sessions.max() + 1
+    keys, session_max = max_by_key(users * width + sessions, durations[mask])
+    return keys // width, session_max
+
+
+def aggregate_codes(user_codes, n_users, event_codes, session_codes, durations, credits, days):
+    """Fused aggregation kernel over integer-coded event columns.
+
+    Every argument is a NumPy array aligned with `user_codes`, which must be
+    in [0, n_users). Returns a dict of per-user feature arrays.
+    """
+    total_events = np.bincount(user_codes, minlength=n_users)
+    unique_event_types = count_distinct_pairs(user_codes, event_codes, n_users)
+
+    session_users, session_max = session_max_durations(user_codes, session_codes, durations)
+    session_sum = np.bincount(session_users, weights=session_max, minlength=n_users)
+    session_count = np.bincount(session_users, minlength=n_users)
+
+    has_credit = ~np.isnan(credits)
+    total_credits_used = np.bincount(user_codes[has_credit], weights=credits[has_credit], minlength=n_users)
+    credit_transaction_count = np.bincount(user_codes[has_credit], minlength=n_users)
+
+    active_days = count_distinct_pairs(user_codes, days, n_users)
+
+    return finish_features(
+        total_events, unique_event_types, session_sum, session_count,
+        total_credits_used, credit_transaction_count, active_days,
+    )
+
+
+def finish_features(total_events, unique_event_types, session_sum, session_count,
+                    total_credits_used, credit_transaction_count, active_days):
+    """Turn per-user partial aggregates into the feature arrays"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg_session_duration_ms = np.where(session_count > 0, session_sum / session_count, 0.0)
+        events_per_day = total_events / active_days
+
+    return {
+        'total_events': total_events,
+        'unique_event_types': unique_event_types,
+        'avg_session_duration_ms': avg_session_duration_ms,
+        'total_credits_used': total_credits_used,
+        'credit_transaction_count': credit_transaction_count,
+        'active_days': active_days,
+        'events_per_day': events_per_day,
+    }
+
+
+def features_frame(persons, features):
+    """Assemble the engineered_features table from per-user arrays"""
+    engineered_features = pd.DataFrame({'person_id': persons})
+    for col in FEATURE_COLUMNS:
+        engineered_features[col] = features[col]
+    # The merge-based block left-joined credit counts, which turned the column
+    # into floats whenever some user had no credit transactions
+    if (engineered_features['credit_transaction_count'] == 0).any():
+        engineered_features['credit_transaction_count'] = engineered_features['credit_transaction_count'].astype('float64')
+    return engineered_features
+
+
+def compute_engineered_features(df):
+    """Compute engineered_features from the event frame in a single pass.
+
+    `person_id` is encoded once (sorted, so rows come out in the same order
+    as a groupby) and every feature is computed from integer codes with
+    bincount/reduceat kernels, without intermediate groupby or merge.
+    """
+    user_codes, persons = dictionary_codes(df['person_id'])
+    keep = user_codes >= 0
+
+    def column(values):
+        return np.asarray(values)[keep]
+
+    features = aggregate_codes(
+        user_codes[keep],
+        len(persons),
+        column(dictionary_codes(df['event'])[0]),
+        column(dictionary_codes(df[SESSION_COLUMN])[0]),
+        column(df[DURATION_COLUMN].to_numpy(dtype='float64', na_value=np.nan)),
+        column(df[CREDITS_COLUMN].to_numpy(dtype='float64', na_value=np.nan)),
+        column(event_days(df)),
+    )
+
+    # Dictionaries may hold users with no events in this frame (e.g. after a
+    # filter on a categorical column); a groupby would not report them
+    present = features['total_events'] > 0
+    engineered_features = features_frame(
+        pd.Index(persons)[present].astype(str),
+        {col: values[present] for col, values in features.items()},
+    )
+    if not engineered_features['person_id'].is_monotonic_increasing:
+        engineered_features = engineered_features.sort_values('person_id', ignore_index=True)
+    return engineered_features
+
+
+# --- Early-window aggregation ----------------------------------------------
+
+MS_PER_DAY = 86_400_000
+
+
+def _prefix(values):
+    return np.r_[0, np.cumsum(values)]
+
+
+def _first_occurrences(keys):
+    return ~pd.Series(keys).duplicated().to_numpy()
+
+
+def compute_window_features(df, window_days=(1, 7, 30)):
+    """engineered_features restricted to each user's first N days after created_at.
+
+    Returns {N: frame} for every N in `window_days`, all from one pass: events
+    are sorted once by (user, offset from created_at), every per-event
+    quantity becomes a prefix sum, and each window is read off with
+    searchsorted cutoffs. Users with no events in a window get zeros.
+    """
+    user_codes, persons = dictionary_codes(df['person_id'])
+    n_users = len(persons)
+    horizon_ms = max(window_days) * MS_PER_DAY
+
+    timestamps = pd.Series(df['timestamp'])
+    created = pd.Series(df['created_at'])
+    offsets = (
+        timestamps.to_numpy(dtype='datetime64[ns]').view('int64')
+        - created.to_numpy(dtype='datetime64[ns]').view('int64')
+    ) // 10**6
+    valid = (
+        (user_codes >= 0) & timestamps.notna().to_numpy() & created.notna().to_numpy()
+        & (offsets >= 0) & (offsets < horizon_ms)
+    )
+    rows = np.flatnonzero(valid)
+    keys = user_codes[rows].astype(np.int64) * horizon_ms + offsets[rows]
+    order = np.argsort(keys, kind='stable')
+    rows = rows[order]
+    keys = keys[order]
+    users = user_codes[rows].astype(np.int64)
+
+    events = np.asarray(dictionary_codes(df['event'])[0])[rows]
+    sessions = np.asarray(dictionary_codes(df[SESSION_COLUMN])[0])[rows]
+    durations = df[DURATION_COLUMN].to_numpy(dtype='float64', na_value=np.nan)[rows]
+    credits = df[CREDITS_COLUMN].to_numpy(dtype='float64', na_value=np.nan)[rows]
+    days = event_days(df)[rows]
+
+    # A distinct value enters a window at its first occurrence, and every
+    # window starts at created_at, so distinct counts are prefix sums too
+    event_first = (events >= 0) & _first_occurrences(pack_pairs(users, events))
+    day_first = (days >= 0) & _first_occurrences(pack_pairs(users, days))
+
+    # Session maxima telescope: each event adds how much it raised its
+    # session's running max, so a window's sum is the max within the window
+    has_session = (sessions >= 0) & ~np.isnan(durations)
+    session_keys = pack_pairs(users[has_session], sessions[has_session])
+    running = pd.Series(durations[has_session]).groupby(session_keys).cummax()
+    session_delta = np.zeros(len(rows))
+    session_delta[has_session] = running - running.groupby(session_keys).shift(fill_value=0)
+    session_first = np.zeros(len(rows), dtype=bool)
+    session_first[has_session] = _first_occurrences(session_keys)
+
+    has_credit = ~np.isnan(credits)
+    prefixes = {
+        'unique_event_types': _prefix(event_first),
+        'session_sum': _prefix(session_delta),
+        'session_count': _prefix(session_first),
+        'total_credits_used': _prefix(np.where(has_credit, credits, 0.0)),
+        'credit_transaction_count': _prefix(has_credit),
+        'active_days': _prefix(day_first),
+    }
+
+    user_offsets = np.arange(n_users, dtype=np.int64) * horizon_ms
+    starts = np.searchsorted(keys, user_offsets)
+    present = np.bincount(user_codes[user_codes >= 0], minlength=n_users) > 0
+    person_ids = pd.Index(persons)[present].astype(str)
+
+    window_features = {}
+    for n_days in window_days:
+        ends = np.searchsorted(keys, user_offsets + n_days * MS_PER_DAY)
+        window = {name: (prefix[ends] - prefix[starts])[present] for name, prefix in prefixes.items()}
+        features = finish_features(
+            (ends - starts)[present],
+            window['unique_event_types'],
+            window['session_sum'],
+            window['session_count'],
+            window['total_credits_used'],
+            window['credit_transaction_count'],
+            window['active_days'],
+        )
+        features['events_per_day'] = np.nan_to_num(features['events_per_day'], nan=0.0)
+        window_features[n_days] = features_frame(person_ids, features)
+    return window_features
+
+
+# --- Parallel aggregation --------------------------------------------------
+
+_partition_frame = None
+_partition_ids = None
+
+
+def _init_partition_worker(frame, partition_ids):
+    # With the fork start method the frame is inherited, not pickled
+    global _partition_frame, _partition_ids
+    _partition_frame = frame
+    _partition_ids = partition_ids
+
+
+def _partition_features(partition):
+    rows = np.flatnonzero(_partition_ids == partition)
+    return compute_engineered_features(_partition_frame.iloc[rows])
+
+
+def parallel_engineered_features(df, n_workers):
+    """Compute engineered_features with users hash-partitioned over processes.
+
+    Every feature is per user, so each partition is independent and the
+    concatenated result is identical to compute_engineered_features(df).
+    """
+    if n_workers <= 1:
+        return compute_engineered_features(df)
+
+    user_codes = dictionary_codes(df['person_id'])[0]
+    partition_ids = np.where(user_codes >= 0, user_codes % n_workers, -1)
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=context,
+        initializer=_init_partition_worker,
+        initargs=(df, partition_ids),
+    ) as pool:
+        parts = list(pool.map(_partition_features, range(n_workers)))
+
+    engineered_features = pd.concat(parts, ignore_index=True)
+    return engineered_features.sort_values('person_id', ignore_index=True)
+
+
+# --- Streaming aggregation -------------------------------------------------
+
+class Dictionary:
+    """Append-only mapping from values to dense integer codes"""
+
+    def __init__(self, values=()):
+        self.values = list(values)
+        self.index = {value: code for code, value in enumerate(self.values)}
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode(self, series):
+        """Codes for `series`, adding unseen values; missing values map to -1"""
+        codes, uniques = pd.factorize(series)
+        mapping = np.empty(len(uniques), dtype=np.int64)
+        for i, value in enumerate(uniques):
+            code = self.index.get(value)
+            if code is None:
+                code = self.index[value] = len(self.values)
+                self.values.append(value)
+            mapping[i] = code
+        out = np.full(len(codes), -1, dtype=np.int64)
+        valid = codes >= 0
+        out[valid] = mapping[codes[valid]]
+        return out
+
+
+class MaxByKey:
+    """Running max of float values per int64 key"""
+
+    def __init__(self, keys=None, values=None):
+        self.keys = np.empty(0, dtype=np.int64) if keys is None else keys
+        self.values = np.empty(0, dtype=np.float64) if values is None else values
+        self.pending = []
+        self.pending_size = 0
+
+    def add(self, keys, values):
+        self.pending.append((keys, values))
+        self.pending_size += len(keys)
+        if self.pending_size > len(self.keys):
+            self.compact()
+
+    def compact(self):
+        if self.pending:
+            keys = np.concatenate([self.keys] + [k for k, _ in self.pending])
+            values = np.concatenate([self.values] + [v for _, v in self.pending])
+            self.keys, self.values = max_by_key(keys, values)
+            self.pending = []
+            self.pending_size = 0
+        return self.keys, self.values
+
+
+class FeatureAccumulator:
+    """Mergeable per-user partial aggregates behind engineered_features.
+
+    Memory grows with the number of users (plus their distinct event types,
+    active days and sessions), never with the number of events fed in. With
+    `distinct_error` set, unique_event_types and active_days come from
+    per-user HyperLogLog sketches with that relative error instead of exact
+    sets.
+    """
+
+    def __init__(self, distinct_error=None):
+        self.distinct_error = distinct_error
+        self.persons = Dictionary()
+        self.events = Dictionary()
+        self.sessions = Dictionary()
+        self.event_hashes = np.zeros(0, dtype=np.int64)
+        self.total_events = np.zeros(0, dtype=np.int64)
+        self.credit_sum = np.zeros(0, dtype=np.float64)
+        self.credit_count = np.zeros(0, dtype=np.int64)
+        if distinct_error is None:
+            self.event_pairs = DistinctKeys()
+            self.day_pairs = DistinctKeys()
+        else:
+            self.event_pairs = UserHyperLogLog(distinct_error)
+            self.day_pairs = UserHyperLogLog(distinct_error)
+        self.session_max = MaxByKey()
+
+    def _grow(self):
+        n = len(self.persons)
+        extra = n - len(self.total_events)
+        if extra > 0:
+            self.total_events = np.r_[self.total_events, np.zeros(extra, dtype=np.int64)]
+            self.credit_sum = np.r_[self.credit_sum, np.zeros(extra, dtype=np.float64)]
+            self.credit_count = np.r_[self.credit_count, np.zeros(extra, dtype=np.int64)]
+        if self.distinct_error is not None and len(self.event_hashes) < len(self.events):
+            new_events = np.array(self.events.values[len(self.event_hashes):], dtype=object)
+            self.event_hashes = np.r_[self.event_hashes, hash32(new_events)]
+        return n
+
+    def update(self, df):
+        """Fold a chunk of events (timestamps already parsed) into the state"""
+        users = self.persons.encode(df['person_id'])
+        keep = users >= 0
+        users = users[keep]
+
+        events = self.events.encode(df['event'])[keep]
+        sessions = self.sessions.encode(df[SESSION_COLUMN])[keep]
+        durations = df[DURATION_COLUMN].to_numpy(dtype='float64', na_value=np.nan)[keep]
+        credits = df[CREDITS_COLUMN].to_numpy(dtype='float64', na_value=np.nan)[keep]
+        days = event_days(df)[keep]
+        n = self._grow()
+
+        self.total_events += np.bincount(users, minlength=n)
+        has_credit = ~np.isnan(credits)
+        self.credit_sum += np.bincount(users[has_credit], weights=credits[has_credit], minlength=n)
+        self.credit_count += np.bincount(users[has_credit], minlength=n)
+
+        has_event = events >= 0
+        has_day = days >= 0
+        if self.distinct_error is None:
+            self.event_pairs.add(pack_pairs(users[has_event], events[has_event]))
+            self.day_pairs.add(pack_pairs(users[has_day], days[has_day]))
+        else:
+            self.event_pairs.add(users[has_event], self.event_hashes[events[has_event]])
+            self.day_pairs.add(users[has_day], hash32(days[has_day]))
+        has_session = (sessions >= 0) & ~np.isnan(durations)
+        self.session_max.add(pack_pairs(users[has_session], sessions[has_session]), durations[has_session])
+        return self
+
+    def merge(self, other):
+        """Fold another accumulator (e.g. from another partition) into this one"""
+        if other.distinct_error != self.distinct_error:
+            raise ValueError("Cannot merge accumulators with different distinct_error settings")
+        user_map = self.persons.encode(np.array(other.persons.values, dtype=object))
+        event_map = self.events.encode(np.array(other.events.values, dtype=object))
+        session_map = self.sessions.encode(np.array(other.sessions.values, dtype=object))
+        self._grow()
+
+        self.total_events[user_map] += other.total_events
+        self.credit_sum[user_map] += other.credit_sum
+        self.credit_count[user_map] += other.credit_count
+
+        if self.distinct_error is None:
+            keys = other.event_pairs.compact()
+            self.event_pairs.add(pack_pairs(user_map[pair_users(keys)], event_map[pair_values(keys)]))
+            keys = other.day_pairs.compact()
+            self.day_pairs.add(pack_pairs(user_map[pair_users(keys)], pair_values(keys)))
+        else:
+            self.event_pairs.merge(other.event_pairs, user_map)
+            self.day_pairs.merge(other.day_pairs, user_map)
+
+        keys, values = other.session_max.compact()
+        self.session_max.add(pack_pairs(user_map[pair_users(keys)], session_map[pair_values(keys)]), values)
+        return self
+
+    def result(self):
+        """engineered_features for every user seen so far, sorted by person_id"""
+        n = len(self.persons)
+        session_keys, session_values = self.session_max.compact()
+        session_users = pair_users(session_keys)
+        features = finish_features(
+            self.total_events,
+            self.event_pairs.counts(n),
+            np.bincount(session_users, weights=session_values, minlength=n),
+            np.bincount(session_users, minlength=n),
+            self.credit_sum,
+            self.credit_count,
+            self.day_pairs.counts(n),
+        )
+        persons = np.array(self.persons.values, dtype=object)
+        order = np.argsort(persons, kind='stable')
+        engineered_features = features_frame(persons[order], {col: values[order] for col, values in features.items()})
+        engineered_features['person_id'] = engineered_features['person_id'].astype(str)
+        return engineered_features
+
+
+def stream_engineered_features(path, chunksize=1_000_000, distinct_error=None):
+    """Compute engineered_features from an event CSV in bounded-size chunks"""
+    accumulator = FeatureAccumulator(distinct_error)
+    with read_events_csv(path, chunksize=chunksize) as reader:
+        for chunk in reader:
+            accumulator.update(parse_timestamps(chunk))
+    return accumulator.result()
@@ -0,0 +1,29 @@
+"""Copy-on-write overlays of frames shared between blocks."""
+import pandas as pd
+
+
+def copy_on_write_enabled():
+    """True when pandas defers copies until a shared column is written"""
+    if int(pd.__version__.split('.')[0]) >= 3:
+        return True
+    try:
+        # pandas 2.x opt-in; 'warn' mode still writes through shared columns
+        return pd.get_option('mode.copy_on_write') is True
+    except KeyError:
+        return False
+
+
+def overlay(frame):
+    """A frame to add columns to without copying `frame`'s columns.
+
+    Under copy-on-write the result shares every existing column with
+    `frame`: new columns such as retention_category or success_tier live only
+    in the overlay, and writing into a shared column copies just that column
+    first, so the upstream frame never changes. Copy-on-write is the default
+    from pandas 3 and canvas_runner turns it on for pandas 2.x blocks; on
+    pandas 2.x without it (e.g. running a block outside the runner) this
+    falls back to a full copy and saves nothing.
+    """
+    if copy_on_write_enabled():
+        return frame.copy(deep=False)
+    return frame.copy()
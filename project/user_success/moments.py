@@ -0,0 +1,244 @@
+"""Mergeable streaming moments: means, co-moments, skewness and kurtosis."""
+import numpy as np
+import pandas as pd
+
+
+def _chunk_matrix(features, columns):
+    return np.column_stack([np.asarray(features[column], dtype=np.float64) for column in columns])
+
+
+class Moments:
+    """Count, mean and central moments of numeric columns, fed chunk by chunk.
+
+    Each chunk's moments are computed around the chunk mean and folded in
+    with Chan et al.'s pairwise update, which keeps Welford's numerical
+    stability while working on whole arrays; accumulators of different
+    chunks or partitions merge the same way, so the result does not depend
+    on how the table was split. Per column, missing values are skipped as
+    by pandas' mean/std/skew/kurtosis. Co-moments (for cov/corr) use the
+    rows complete in every column.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        p = len(self.columns)
+        self.n = np.zeros(p)
+        self.mean_ = np.zeros(p)
+        self.m2 = np.zeros(p)
+        self.m3 = np.zeros(p)
+        self.m4 = np.zeros(p)
+        self.pairs = 0
+        self.pair_mean = np.zeros(p)
+        self.comoment = np.zeros((p, p))
+
+    def update(self, features):
+        """Fold in a chunk (DataFrame or mapping of columns)"""
+        values = _chunk_matrix(features, self.columns)
+        valid = ~np.isnan(values)
+        chunk = Moments(self.columns)
+        chunk.n = valid.sum(axis=0).astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            chunk.mean_ = np.nan_to_num(np.where(valid, values, 0).sum(axis=0) / chunk.n)
+        deviation = np.where(valid, values - chunk.mean_, 0)
+        power = deviation * deviation
+        chunk.m2 = power.sum(axis=0)
+        chunk.m3 = (power * deviation).sum(axis=0)
+        chunk.m4 = (power * power).sum(axis=0)
+
+        complete = values[valid.all(axis=1)]
+        chunk.pairs = len(complete)
+        if chunk.pairs:
+            chunk.pair_mean = complete.mean(axis=0)
+            centered = complete - chunk.pair_mean
+            chunk.comoment = centered.T @ centered
+        self.merge(chunk)
+
+    def merge(self, other):
+        """Fold in another accumulator of the same columns"""
+        if other.columns != self.columns:
+            raise ValueError("Cannot merge moments of different columns")
+        n_a, n_b = self.n, other.n
+        n = n_a + n_b
+        safe_n = np.where(n > 0, n, 1)
+        delta = other.mean_ - self.mean_
+        delta_n = delta / safe_n
+        product = n_a * n_b
+        self.m4 = (
+            self.m4 + other.m4
+            + delta * delta_n ** 3 * product * (n_a * n_a - product + n_b * n_b)
+            + 6 * delta_n ** 2 * (n_a * n_a * other.m2 + n_b * n_b * self.m2)
+            + 4 * delta_n * (n_a * other.m3 - n_b * self.m3)
+        )
+        self.m3 = (
+            self.m3 + other.m3
+            + delta * delta_n ** 2 * product * (n_a - n_b)
+            + 3 * delta_n * (n_a * other.m2 - n_b * self.m2)
+        )
+        self.m2 = self.m2 + other.m2 + delta * delta_n * product
+        self.mean_ = self.mean_ + delta_n * n_b
+        self.n = n
+
+        pairs = self.pairs + other.pairs
+        if other.pairs:
+            pair_delta = other.pair_mean - self.pair_mean
+            self.comoment = self.comoment + other.comoment + np.outer(pair_delta, pair_delta) * (
+                self.pairs * other.pairs / pairs
+            )
+            self.pair_mean = self.pair_mean + pair_delta * (other.pairs / pairs)
+        self.pairs = pairs
+
+    def _series(self, values):
+        return pd.Series(values, index=self.columns)
+
+    def _frame(self, values):
+        return pd.DataFrame(values, index=self.columns, columns=self.columns)
+
+    def count(self):
+        return self._series(self.n.astype(np.int64))
+
+    def mean(self):
+        return self._series(np.where(self.n > 0, self.mean_, np.nan))
+
+    def var(self, ddof=1):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self._series(np.where(self.n > ddof, self.m2 / (self.n - ddof), np.nan))
+
+    def std(self, ddof=1):
+        return np.sqrt(self.var(ddof))
+
+    def skew(self):
+        """Bias-corrected sample skewness, as Series.skew"""
+        n, m2 = self.n, self._zero_round_off(self.m2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            skew = n * np.sqrt(n - 1) / (n - 2) * (self.m3 / m2 ** 1.5)
+        skew = np.where(m2 == 0, 0.0, skew)
+        return self._series(np.where(n < 3, np.nan, skew))
+
+    def kurtosis(self):
+        """Bias-corrected excess kurtosis, as Series.kurtosis"""
+        n, m2 = self.n, self._zero_round_off(self.m2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            kurtosis = (
+                n * (n + 1) * (n - 1) * self.m4 / ((n - 2) * (n - 3) * m2 ** 2)
+                - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+            )
+        kurtosis = np.where(m2 == 0, 0.0, kurtosis)
+        return self._series(np.where(n < 4, np.nan, kurtosis))
+
+    @staticmethod
+    def _zero_round_off(m2):
+        # As pandas: a sum of squares this small is a constant column
+        return np.where(np.abs(m2) < 1e-14, 0.0, m2)
+
+    def normaltest(self):
+        """D'Agostino-Pearson K² statistic and p-value per column, from the
+        moments alone (as scipy.stats.normaltest; NaN below 8 values)"""
+        n = self.n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            m2 = self.m2 / n
+            skewness = (self.m3 / n) / m2 ** 1.5
+            kurtosis = (self.m4 / n) / m2 ** 2
+
+            y = skewness * np.sqrt((n + 1) * (n + 3) / (6 * (n - 2)))
+            beta2 = 3 * (n * n + 27 * n - 70) * (n + 1) * (n + 3) / ((n - 2) * (n + 5) * (n + 7) * (n + 9))
+            w2 = -1 + np.sqrt(2 * (beta2 - 1))
+            delta = 1 / np.sqrt(0.5 * np.log(w2))
+            alpha = np.sqrt(2 / (w2 - 1))
+            y = np.where(y == 0, 1, y)
+            z_skew = delta * np.log(y / alpha + np.sqrt((y / alpha) ** 2 + 1))
+
+            expected = 3 * (n - 1) / (n + 1)
+            variance = 24 * n * (n - 2) * (n - 3) / ((n + 1) ** 2 * (n + 3) * (n + 5))
+            x = (kurtosis - expected) / np.sqrt(variance)
+            sqrt_beta1 = 6 * (n * n - 5 * n + 2) / ((n + 7) * (n + 9)) * np.sqrt(
+                6 * (n + 3) * (n + 5) / (n * (n - 2) * (n - 3))
+            )
+            a = 6 + 8 / sqrt_beta1 * (2 / sqrt_beta1 + np.sqrt(1 + 4 / sqrt_beta1 ** 2))
+            term1 = 1 - 2 / (9 * a)
+            denominator = 1 + x * np.sqrt(2 / (a - 4))
+            term2 = np.sign(denominator) * np.where(
+                denominator == 0, np.nan, ((1 - 2 / a) / np.abs(denominator)) ** (1 / 3)
+            )
+            z_kurtosis = (term1 - term2) / np.sqrt(2 / (9 * a))
+
+            statistic = np.where(n < 8, np.nan, z_skew ** 2 + z_kurtosis ** 2)
+        # Chi-squared with 2 degrees of freedom
+        return self._series(statistic), self._series(np.exp(-statistic / 2))
+
+    def cov(self, ddof=1):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self._frame(self.comoment / (self.pairs - ddof) if self.pairs > ddof else np.nan)
+
+    def corr(self):
+        """Pearson correlation over the complete rows (DataFrame.corr when
+        nothing is missing; NaN for constant columns)"""
+        scale = np.sqrt(self._zero_round_off(np.diag(self.comoment)))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = self.comoment / np.outer(scale, scale)
+        varying = scale > 0
+        corr = np.where(np.outer(varying, varying), np.clip(corr, -1, 1), np.nan)
+        np.fill_diagonal(corr, np.where(varying, 1.0, np.nan))
+        return self._frame(corr)
+
+
+class GroupedMoments:
+    """Moments per group key, for group-wise means and spreads of chunks.
+
+    Rows with a missing key are skipped and groups are reported in sorted
+    key order (category order for categorical keys), as DataFrame.groupby.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.groups = {}
+        self.categories = None
+        self.name = None
+
+    def update(self, features, keys):
+        keys = pd.Series(keys) if not isinstance(keys, pd.Series) else keys
+        self.name = keys.name
+        if isinstance(keys.dtype, pd.CategoricalDtype):
+            self.categories = keys.cat.categories
+        codes, uniques = pd.factorize(keys)
+        values = _chunk_matrix(features, self.columns)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        for code, key in enumerate(uniques):
+            rows = order[bounds[code]:bounds[code + 1]]
+            chunk = dict(zip(self.columns, values[rows].T))
+            self.groups.setdefault(key, Moments(self.columns)).update(chunk)
+
+    def merge(self, other):
+        for key, moments in other.groups.items():
+            if key in self.groups:
+                self.groups[key].merge(moments)
+            else:
+                merged = Moments(self.columns)
+                merged.merge(moments)
+                self.groups[key] = merged
+        if self.categories is None:
+            self.categories = other.categories
+        if self.name is None:
+            self.name = other.name
+
+    def _keys(self):
+        if self.categories is not None:
+            return [key for key in self.categories if key in self.groups]
+        return sorted(self.groups)
+
+    def _frame(self, statistic):
+        keys = self._keys()
+        return pd.DataFrame(
+            [getattr(self.groups[key], statistic)() for key in keys],
+            index=pd.Index(keys, name=self.name),
+            columns=self.columns,
+        )
+
+    def count(self):
+        return self._frame('count')
+
+    def mean(self):
+        return self._frame('mean')
+
+    def std(self):
+        return self._frame('std')
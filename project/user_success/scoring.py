@@ -0,0 +1,190 @@
+"""Fitted success scoring: the 3-of-4 rule, continuous score and tiers."""
+import json
+import os
+
+import numpy as np
+
+from user_success.sketches import QuantileSketch
+
+SCORER_VERSION = 1
+
+# (indicator column, feature, minimum value) for the binary success rule
+SUCCESS_CRITERIA = (
+    ('has_retention', 'active_days', 2),
+    ('has_engagement_depth', 'unique_event_types', 3),
+    ('has_activity_volume', 'total_events', 5),
+    ('has_session_quality', 'avg_session_duration_ms', 120000),  # 2 min in ms
+)
+MIN_CRITERIA_MET = 3
+
+# (component column, feature, weight) for success_score_continuous
+SCORE_COMPONENTS = (
+    ('retention_score', 'active_days', 0.30),
+    ('engagement_score', 'unique_event_types', 0.25),
+    ('activity_score', 'total_events', 0.20),
+    ('session_score', 'avg_session_duration_ms', 0.15),
+    ('credit_score', 'total_credits_used', 0.10),
+)
+CAP_PERCENTILE = 95
+
+# Right-closed bins as in pd.cut: a score of exactly 0 falls in no tier
+TIER_BINS = (0, 20, 40, 60, 80, 100)
+TIER_LABELS = ('At Risk', 'Low', 'Medium', 'High', 'Very High')
+
+
+class SuccessScorer:
+    """Success metrics with frozen normalization caps.
+
+    `fit` takes each component's cap (the CAP_PERCENTILE quantile, ignoring
+    missing values) from a reference user table once; `score` then applies
+    the criteria, caps, weights and tier bins to any batch with plain NumPy
+    array operations, so new users are scored against the same reference
+    instead of against their own batch. `save`/`load` persist the fitted
+    parameters as JSON.
+    """
+
+    def __init__(self, caps, criteria=SUCCESS_CRITERIA, min_criteria=MIN_CRITERIA_MET,
+                 components=SCORE_COMPONENTS, tier_bins=TIER_BINS, tier_labels=TIER_LABELS,
+                 cap_percentile=CAP_PERCENTILE):
+        self.caps = dict(caps)
+        self.criteria = tuple(tuple(criterion) for criterion in criteria)
+        self.min_criteria = min_criteria
+        self.components = tuple(tuple(component) for component in components)
+        self.tier_bins = tuple(tier_bins)
+        self.tier_labels = tuple(tier_labels)
+        self.cap_percentile = cap_percentile
+
+    @classmethod
+    def fit(cls, features, cap_percentile=CAP_PERCENTILE, **kwargs):
+        """Fit the caps on a reference table (DataFrame or mapping of columns)"""
+        components = kwargs.get('components', SCORE_COMPONENTS)
+        caps = {}
+        for _, column, _ in components:
+            values = np.asarray(features[column], dtype=np.float64)
+            values = values[~np.isnan(values)]
+            # Linear interpolation, as Series.quantile
+            caps[column] = float(np.quantile(values, cap_percentile / 100)) if len(values) else float('nan')
+        return cls(caps, cap_percentile=cap_percentile, **kwargs)
+
+    @classmethod
+    def fit_stream(cls, chunks, rank_error=0.001, cap_percentile=CAP_PERCENTILE, **kwargs):
+        """Fit the caps from an iterable of user-table chunks (see CapSketches)"""
+        sketches = CapSketches(rank_error, kwargs.get('components', SCORE_COMPONENTS))
+        for chunk in chunks:
+            sketches.update(chunk)
+        return sketches.scorer(cap_percentile, **kwargs)
+
+    def score(self, features, dtype=np.float32):
+        """Success columns for every row of `features`, as NumPy arrays.
+
+        Returns {column: array} with the four criterion indicators,
+        success_score (criteria met) and is_successful as int64, as the
+        canvas columns have always been, the five component scores,
+        success_score_continuous (0-100) and success_tier_code (index into
+        tier_labels, -1 outside the bins or when missing).
+        Missing inputs fail their criterion and propagate NaN into the
+        continuous score.
+        """
+        dtype = np.dtype(dtype).type
+        result = {}
+        met = None
+        for indicator, column, minimum in self.criteria:
+            flag = (np.asarray(features[column]) >= minimum).astype(np.int64)
+            result[indicator] = flag
+            met = flag.copy() if met is None else met + flag
+        result['success_score'] = met
+        result['is_successful'] = (met >= self.min_criteria).astype(np.int64)
+
+        continuous = None
+        for name, column, weight in self.components:
+            values = np.asarray(features[column], dtype=dtype)
+            cap = self.caps[column]
+            if cap > 0:
+                component = np.minimum(values, dtype(cap)) / dtype(cap)
+            elif np.isnan(cap):
+                component = values.copy()
+            else:
+                component = np.minimum(values, dtype(cap))
+            result[name] = component
+            weighted = component * dtype(weight)
+            continuous = weighted if continuous is None else continuous + weighted
+        continuous *= dtype(100)
+        result['success_score_continuous'] = continuous
+        result['success_tier_code'] = self.tier_codes(continuous)
+        return result
+
+    def tier_codes(self, scores):
+        """Tier index per score with right-closed bins; -1 when out of range or NaN"""
+        bins = np.asarray(self.tier_bins, dtype=scores.dtype)
+        codes = np.searchsorted(bins, scores, side='left') - 1
+        outside = (codes < 0) | (codes >= len(self.tier_labels)) | np.isnan(scores)
+        return np.where(outside, -1, codes).astype(np.int8)
+
+    def score_user(self, user, dtype=np.float64):
+        """Score a single user given as a mapping of feature values"""
+        columns = {column for _, column, _ in self.criteria} | {column for _, column, _ in self.components}
+        arrays = {column: np.asarray([user[column]], dtype=np.float64) for column in columns}
+        scores = {name: values[0].item() for name, values in self.score(arrays, dtype=dtype).items()}
+        code = scores['success_tier_code']
+        scores['success_tier'] = self.tier_labels[code] if code >= 0 else None
+        return scores
+
+    def to_dict(self):
+        return {
+            'version': SCORER_VERSION,
+            'caps': self.caps,
+            'cap_percentile': self.cap_percentile,
+            'criteria': [list(criterion) for criterion in self.criteria],
+            'min_criteria': self.min_criteria,
+            'components': [list(component) for component in self.components],
+            'tier_bins': list(self.tier_bins),
+            'tier_labels': list(self.tier_labels),
+        }
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            state = json.load(f)
+        if state.get('version') != SCORER_VERSION:
+            raise ValueError(f"{path} holds scorer version {state.get('version')}, expected {SCORER_VERSION}")
+        state.pop('version')
+        return cls(**state)
+
+
+class CapSketches:
+    """Mergeable quantile sketches of every score component's feature.
+
+    Feed user-table chunks (or build one per partition and merge them) to
+    get the normalization caps without holding or sorting whole columns.
+    Each cap is within `rank_error` in rank of the exact percentile, and
+    exact while a column has seen fewer values than the sketch keeps.
+    """
+
+    def __init__(self, rank_error=0.001, components=SCORE_COMPONENTS):
+        self.rank_error = rank_error
+        self.components = tuple(tuple(component) for component in components)
+        self.sketches = {
+            column: QuantileSketch(rank_error, seed=i) for i, (_, column, _) in enumerate(self.components)
+        }
+
+    def update(self, features):
+        for column, sketch in self.sketches.items():
+            sketch.update(features[column])
+
+    def merge(self, other):
+        for column, sketch in self.sketches.items():
+            sketch.merge(other.sketches[column])
+
+    def caps(self, cap_percentile=CAP_PERCENTILE):
+        return {column: sketch.quantile(cap_percentile / 100) for column, sketch in self.sketches.items()}
+
+    def scorer(self, cap_percentile=CAP_PERCENTILE, **kwargs):
+        kwargs.setdefault('components', self.components)
+        return SuccessScorer(self.caps(cap_percentile), cap_percentile=cap_percentile, **kwargs)
@@ -0,0 +1,103 @@
+"""Success rate and class balance across a grid of success-rule thresholds."""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from user_success.scoring import SuccessScorer
+
+
+def _met_counts(values, thresholds):
+    """Per user, how many of the sorted `thresholds` its value reaches.
+
+    A user meets the criterion at grid index j exactly when the count is
+    greater than j. Missing values meet no threshold.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    counts = np.searchsorted(thresholds, values, side='right')
+    counts[np.isnan(values)] = 0
+    return counts
+
+
+def _split_axis(hist, axis):
+    """(not met, met) user counts per threshold index along `axis`"""
+    below_or_at = np.cumsum(hist, axis=axis)
+    n_thresholds = hist.shape[axis] - 1
+    not_met = np.take(below_or_at, range(n_thresholds), axis=axis)
+    total = np.take(below_or_at, [n_thresholds], axis=axis)
+    return not_met, total - not_met
+
+
+def threshold_grid(features, grid, min_criteria=(2, 3, 4), scorer=None):
+    """Evaluate the k-of-n success rule for every combination of thresholds.
+
+    `grid` maps criterion features (see scoring.SUCCESS_CRITERIA) to the
+    thresholds to try; features left out keep the scorer's threshold. Each
+    user is reduced to the number of grid thresholds it reaches per feature,
+    and one histogram over those counts (and the user's success tier) gives
+    every combination through cumulative sums, instead of re-evaluating
+    the rule per combination.
+
+    Returns one row per (thresholds, min_criteria) with n_successful,
+    n_unsuccessful, success_rate, imbalance_ratio (majority / minority
+    class size) and the successful users per tier of the continuous score.
+    """
+    if scorer is None:
+        scorer = SuccessScorer.fit(features)
+    criteria = [column for _, column, _ in scorer.criteria]
+    unknown = sorted(set(grid) - set(criteria))
+    if unknown:
+        raise KeyError(f"Not success criteria: {unknown}")
+    thresholds = [
+        np.unique(np.asarray(grid[column] if column in grid else [minimum], dtype=np.float64))
+        for _, column, minimum in scorer.criteria
+    ]
+
+    # Tier of each user's continuous score; the extra last bucket is "no tier"
+    n_tiers = len(scorer.tier_labels)
+    tiers = scorer.score(features, dtype=np.float64)['success_tier_code'].astype(np.int64)
+    tiers[tiers < 0] = n_tiers
+
+    counts = [_met_counts(features[column], levels) for column, levels in zip(criteria, thresholds)]
+    shape = tuple(len(levels) + 1 for levels in thresholds) + (n_tiers + 1,)
+    hist = np.bincount(
+        np.ravel_multi_index(counts + [tiers], shape), minlength=int(np.prod(shape))
+    ).reshape(shape)
+
+    # Users by which criteria they meet: one array per met/not-met pattern,
+    # each indexed by threshold position on every axis, then tier
+    patterns = {(): hist}
+    for axis in range(len(criteria)):
+        split = {}
+        for pattern, part in patterns.items():
+            not_met, met = _split_axis(part, axis)
+            split[pattern + (0,)] = not_met
+            split[pattern + (1,)] = met
+        patterns = split
+
+    n_users = hist.sum()
+    grid_shape = tuple(len(levels) for levels in thresholds)
+    combos = np.array(list(itertools.product(*[range(n) for n in grid_shape])))
+    frames = []
+    for k in min_criteria:
+        successful = sum(part for pattern, part in patterns.items() if sum(pattern) >= k)
+        if isinstance(successful, int):
+            successful = np.zeros(grid_shape + (n_tiers + 1,), dtype=np.int64)
+        by_tier = successful.reshape(-1, n_tiers + 1)
+        n_successful = by_tier.sum(axis=1)
+        n_unsuccessful = n_users - n_successful
+        frame = pd.DataFrame({
+            column: levels[combos[:, i]] for i, (column, levels) in enumerate(zip(criteria, thresholds))
+        })
+        frame['min_criteria'] = k
+        frame['n_successful'] = n_successful
+        frame['n_unsuccessful'] = n_unsuccessful
+        frame['success_rate'] = n_successful / n_users if n_users else np.nan
+        with np.errstate(divide='ignore', invalid='ignore'):
+            frame['imbalance_ratio'] = (
+                np.maximum(n_successful, n_unsuccessful) / np.minimum(n_successful, n_unsuccessful)
+            )
+        for tier, label in enumerate(scorer.tier_labels + ('no tier',)):
+            frame['successful_' + label.lower().replace(' ', '_')] = by_tier[:, tier]
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,254 @@
+"""Mergeable summaries: per-user distinct counts and column quantiles."""
+import math
+
+import numpy as np
+import pandas as pd
+
+# Keys for (user, value) pairs pack the user code into the high 32 bits so
+# partial results from different chunks can be unioned with plain sorts.
+PAIR_SHIFT = 32
+VALUE_MASK = (1 << PAIR_SHIFT) - 1
+
+
+def pack_pairs(user_codes, value_codes):
+    return (user_codes.astype(np.int64) << PAIR_SHIFT) | value_codes.astype(np.int64)
+
+
+def pair_users(keys):
+    return keys >> PAIR_SHIFT
+
+
+def pair_values(keys):
+    return keys & VALUE_MASK
+
+
+def hash32(values):
+    """Stable 32-bit hash of each value, identical across processes and runs"""
+    return (pd.util.hash_array(np.asarray(values)) >> np.uint64(32)).astype(np.int64)
+
+
+class DistinctKeys:
+    """Set of int64 keys, compacted lazily so repeated unions stay cheap"""
+
+    def __init__(self, keys=None):
+        self.keys = np.empty(0, dtype=np.int64) if keys is None else keys
+        self.pending = []
+        self.pending_size = 0
+
+    def add(self, keys):
+        keys = np.unique(keys)
+        self.pending.append(keys)
+        self.pending_size += len(keys)
+        if self.pending_size > len(self.keys):
+            self.compact()
+
+    def compact(self):
+        if self.pending:
+            self.keys = np.unique(np.concatenate([self.keys] + self.pending))
+            self.pending = []
+            self.pending_size = 0
+        return self.keys
+
+    def counts(self, n_users):
+        """Distinct values per user for keys built with pack_pairs"""
+        return np.bincount(pair_users(self.compact()), minlength=n_users)
+
+
+def precision_for_error(relative_error):
+    """HyperLogLog precision whose standard error is at most `relative_error`"""
+    precision = math.ceil(2 * math.log2(1.04 / relative_error))
+    return min(max(precision, 4), 16)
+
+
+def _alpha(m):
+    if m == 16:
+        return 0.673
+    if m == 32:
+        return 0.697
+    if m == 64:
+        return 0.709
+    return 0.7213 / (1 + 1.079 / m)
+
+
+class UserHyperLogLog:
+    """Per-user distinct counts: exact while small, HyperLogLog beyond that.
+
+    Values are given as 32-bit hashes (see hash32). A user keeps its exact
+    hash set until it holds more than `exact_threshold` values, then moves to
+    a register row of 2**precision bytes, so memory per user is bounded. Two
+    sketches merge by unioning exact sets and taking register maxima.
+    """
+
+    def __init__(self, relative_error=0.02, exact_threshold=32):
+        self.relative_error = relative_error
+        self.precision = precision_for_error(relative_error)
+        self.exact_threshold = exact_threshold
+        self.exact = DistinctKeys()
+        self.dense_rows = np.zeros(0, dtype=np.int64)
+        self.registers = np.zeros((0, 1 << self.precision), dtype=np.uint8)
+
+    def _grow(self, n_users):
+        extra = n_users - len(self.dense_rows)
+        if extra > 0:
+            self.dense_rows = np.r_[self.dense_rows, np.full(extra, -1, dtype=np.int64)]
+
+    def _update_registers(self, rows, hashes):
+        p = self.precision
+        buckets = hashes >> (32 - p)
+        rest = (hashes << p) & VALUE_MASK
+        # Position of the leading one bit in the remaining 32 - p bits
+        exponents = np.frexp(rest.astype(np.float64))[1]
+        ranks = np.where(rest > 0, 33 - exponents, 33 - p).astype(np.uint8)
+        np.maximum.at(self.registers, (rows, buckets), ranks)
+
+    def _make_dense(self, users):
+        """Give `users` register rows, moving their exact hashes into them"""
+        users = np.unique(users[self.dense_rows[users] < 0])
+        if len(users) == 0:
+            return
+        start = len(self.registers)
+        self.dense_rows[users] = np.arange(start, start + len(users))
+        self.registers = np.concatenate(
+            [self.registers, np.zeros((len(users), self.registers.shape[1]), dtype=np.uint8)]
+        )
+        keys = self.exact.compact()
+        key_users = pair_users(keys)
+        moved = self.dense_rows[key_users] >= 0
+        self._update_registers(self.dense_rows[key_users[moved]], pair_values(keys[moved]))
+        self.exact.keys = keys[~moved]
+
+    def _promote(self):
+        counts = np.bincount(pair_users(self.exact.compact()), minlength=len(self.dense_rows))
+        self._make_dense(np.flatnonzero(counts > self.exact_threshold))
+
+    def add(self, users, hashes):
+        """Record that each user saw the value with the matching hash"""
+        if len(users) == 0:
+            return
+        self._grow(users.max() + 1)
+        rows = self.dense_rows[users]
+        dense = rows >= 0
+        if dense.any():
+            self._update_registers(rows[dense], hashes[dense])
+        self.exact.add(pack_pairs(users[~dense], hashes[~dense]))
+        if not self.exact.pending:
+            # Only check promotions after a compaction to keep adds cheap
+            self._promote()
+
+    def compact(self):
+        self._promote()
+
+    def merge(self, other, user_map):
+        """Fold `other` in, mapping its user codes through `user_map`"""
+        if len(user_map) == 0:
+            return
+        self._grow(user_map.max() + 1)
+        other_users = np.flatnonzero(other.dense_rows >= 0)
+        if len(other_users):
+            targets = user_map[other_users]
+            self._make_dense(targets)
+            rows = self.dense_rows[targets]
+            self.registers[rows] = np.maximum(self.registers[rows], other.registers[other.dense_rows[other_users]])
+        keys = other.exact.compact()
+        self.add(user_map[pair_users(keys)], pair_values(keys))
+        self._promote()
+
+    def counts(self, n_users):
+        """Estimated distinct values per user, rounded to integers"""
+        self._grow(n_users)
+        self._promote()
+        counts = np.bincount(pair_users(self.exact.keys), minlength=n_users).astype(np.float64)
+
+        dense_users = np.flatnonzero(self.dense_rows >= 0)
+        if len(dense_users):
+            registers = self.registers[self.dense_rows[dense_users]]
+            m = registers.shape[1]
+            estimate = _alpha(m) * m * m / np.sum(np.exp2(-registers.astype(np.float64)), axis=1)
+            zeros = np.sum(registers == 0, axis=1)
+            # Linear counting is more accurate in the small range
+            small = (estimate <= 2.5 * m) & (zeros > 0)
+            estimate[small] = m * np.log(m / zeros[small])
+            counts[dense_users] = estimate
+        return np.rint(counts[:n_users]).astype(np.int64)
+
+
+# Normalized rank error of a KLL sketch is about this constant over k
+KLL_ERROR_CONSTANT = 1.7
+
+
+def kll_k_for_error(rank_error):
+    """KLL accuracy parameter k for a normalized rank error of `rank_error`"""
+    return max(8, math.ceil(KLL_ERROR_CONSTANT / rank_error))
+
+
+class QuantileSketch:
+    """Mergeable streaming quantiles of one numeric column (KLL sketch).
+
+    Values go into a stack of compactors; level h holds items that each
+    stand for 2**h inputs. A level over its capacity is sorted and every
+    other item (random offset) is promoted one level up, so memory stays at
+    O(k) items however many values are fed. quantile(q) returns a value
+    whose rank is within about `rank_error * n` of q * n. Until the first
+    compaction everything is kept and quantile() is exact, matching
+    Series.quantile's linear interpolation. Sketches built with the same
+    error merge, so chunks or partitions can be summarized independently.
+    """
+
+    def __init__(self, rank_error=0.001, seed=0):
+        self.rank_error = rank_error
+        self.k = kll_k_for_error(rank_error)
+        self.levels = [np.empty(0, dtype=np.float64)]
+        self.n = 0
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, math.ceil(self.k * (2 / 3) ** depth))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                # An odd item out stays behind so the promoted weight is exact
+                odd = len(items) % 2
+                promoted = items[odd + self._rng.integers(2)::2]
+                self.levels[level] = items[:odd]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values):
+        """Add a batch of values; NaNs are ignored, as by Series.quantile"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        """Fold another sketch of the same column into this one"""
+        if other.k != self.k:
+            raise ValueError(f"Cannot merge KLL sketches with k={self.k} and k={other.k}")
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+
+    def quantile(self, q):
+        if self.n == 0:
+            return float('nan')
+        if len(self.levels) == 1:
+            return float(np.quantile(self.levels[0], q))
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2**level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        index = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        return float(values[order][min(index, len(values) - 1)])
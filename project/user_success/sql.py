@@ -0,0 +1,99 @@
+"""Embedded DuckDB backend for engineered_features."""
+import os
+
+import numpy as np
+
+from user_success.events import cache_path_for
+from user_success.features import features_frame
+
+# DuckDB reads only the columns the query touches; the types pin what
+# auto-detection might guess differently between exports
+CSV_TYPES = {
+    'person_id': 'VARCHAR',
+    'event': 'VARCHAR',
+    'timestamp': 'VARCHAR',
+    'prop_$session_id': 'VARCHAR',
+    'prop_$sdk_debug_current_session_duration': 'DOUBLE',
+    'prop_credits_used': 'DOUBLE',
+}
+
+FEATURES_QUERY = """
+WITH events AS (
+    SELECT
+        person_id,
+        event,
+        "prop_$session_id" AS session_id,
+        "prop_$sdk_debug_current_session_duration" AS duration,
+        prop_credits_used AS credits,
+        {day_expr} AS day
+    FROM {source}
+    WHERE person_id IS NOT NULL
+),
+session_avg AS (
+    SELECT person_id, avg(session_max) AS avg_session_duration_ms
+    FROM (
+        SELECT person_id, max(duration) AS session_max
+        FROM events
+        WHERE session_id IS NOT NULL
+        GROUP BY person_id, session_id
+    )
+    GROUP BY person_id
+)
+SELECT
+    person_id,
+    count(*) AS total_events,
+    count(DISTINCT event) AS unique_event_types,
+    coalesce(any_value(s.avg_session_duration_ms), 0) AS avg_session_duration_ms,
+    coalesce(sum(credits), 0) AS total_credits_used,
+    count(credits) AS credit_transaction_count,
+    count(DISTINCT day) AS active_days
+FROM events
+LEFT JOIN session_avg s USING (person_id)
+GROUP BY person_id
+ORDER BY person_id
+"""
+
+
+def _quote(path):
+    return "'" + str(path).replace("'", "''") + "'"
+
+
+def events_source(path):
+    """DuckDB table expression and day expression for the event log.
+
+    Prefers the Parquet cache written by load_events (with its integer
+    `date` column, whose -1 for a missing timestamp becomes NULL so it is
+    not counted as a day); otherwise reads the CSV, taking the calendar date
+    from the ISO8601 string itself as dt.date does.
+    """
+    cache_file = cache_path_for(path)
+    if os.path.exists(cache_file):
+        return f"read_parquet({_quote(cache_file)})", 'NULLIF(date, -1)'
+    types = ', '.join(f"{_quote(col)}: {_quote(sql_type)}" for col, sql_type in CSV_TYPES.items())
+    source = f"read_csv({_quote(path)}, header = true, types = {{{types}}})"
+    return source, 'CAST(substr("timestamp", 1, 10) AS DATE)'
+
+
+def sql_engineered_features(path, threads=None, memory_limit=None, temp_directory=None):
+    """Compute engineered_features with a single DuckDB query.
+
+    DuckDB runs the aggregation vectorized over all cores and spills to
+    `temp_directory` past `memory_limit` (e.g. '8GB'), so the event log never
+    has to fit in pandas. The result matches compute_engineered_features.
+    """
+    import duckdb
+
+    source, day_expr = events_source(path)
+    with duckdb.connect() as con:
+        if threads:
+            con.execute(f"SET threads = {int(threads)}")
+        if memory_limit:
+            con.execute(f"SET memory_limit = {_quote(memory_limit)}")
+        if temp_directory:
+            con.execute(f"SET temp_directory = {_quote(temp_directory)}")
+        result = con.execute(FEATURES_QUERY.format(source=source, day_expr=day_expr)).df()
+
+    features = {col: result[col].to_numpy() for col in result.columns if col != 'person_id'}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        features['events_per_day'] = features['total_events'] / features['active_days']
+    return features_frame(result['person_id'].astype(str).to_numpy(dtype=object), features)
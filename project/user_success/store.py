@@ -0,0 +1,74 @@
+"""Persistent incremental feature store for engineered_features."""
+import os
+import pickle
+
+from user_success.features import FeatureAccumulator
+
+STORE_VERSION = 2
+
+
+class FeatureStore:
+    """Per-user mergeable aggregates plus a timestamp watermark.
+
+    Each refresh only folds in events strictly newer than the watermark, so a
+    daily run costs the size of the new events rather than the full history.
+    Events that arrive late with a timestamp at or before the watermark are
+    not picked up; rebuild the store (delete the file) to include them.
+    Events without a timestamp cannot be placed against the watermark, so
+    no refresh ingests them: the store's features are those of the
+    timestamped events only.
+    `distinct_error` selects HyperLogLog distinct counts (see
+    FeatureAccumulator); a stored state built with another setting is
+    discarded and rebuilt.
+    """
+
+    def __init__(self, path, distinct_error=None):
+        self.path = path
+        self.accumulator = FeatureAccumulator(distinct_error)
+        self.watermark = None
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with open(self.path, 'rb') as f:
+            state = pickle.load(f)
+        if state.get('version') != STORE_VERSION:
+            # Stale layout: start over from a full recompute
+            return
+        if state['accumulator'].distinct_error != self.accumulator.distinct_error:
+            return
+        self.accumulator = state['accumulator']
+        self.watermark = state['watermark']
+
+    def save(self):
+        self.accumulator.event_pairs.compact()
+        self.accumulator.day_pairs.compact()
+        self.accumulator.session_max.compact()
+        state = {'version': STORE_VERSION, 'watermark': self.watermark, 'accumulator': self.accumulator}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+    def refresh(self, events):
+        """Fold timestamped events newer than the watermark into the store
+        and save it.
+
+        Returns the number of new events ingested.
+        """
+        if self.watermark is None:
+            events = events[events['timestamp'].notna()]
+        else:
+            events = events[events['timestamp'] > self.watermark]
+        if len(events) == 0:
+            return 0
+
+        self.accumulator.update(events)
+        self.watermark = events['timestamp'].max()
+        self.save()
+        return len(events)
+
+    def features(self):
+        """Current engineered_features for every user in the store"""
+        return self.accumulator.result()